@@ -1,13 +1,29 @@
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic.networks import EmailStr
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
+from core.bulk import bulk_results
+from core.config import settings
 from core.database import get_db
-from core.security import create_access_token
+from core.etag import has_if_none_match, not_modified, set_etag
+from core.export import EXPORT_FORMATS, export_columns, export_chunks
+from core.fields import parse_fields, trimmed_schema
+from core.filters import parse_filters, parse_sort
+from core.includes import parse_include
+from core.pagination import decode_cursor, next_cursor, set_pagination_headers, set_total_count
+from core.replicas import get_read_db
+from core.responses import fast_response, serialize
+from core.security import (
+    create_access_token, create_refresh_token, get_password_hash_async, get_password_hashes_async, verify_password_async,
+)
 
 from authentication import schemas, cruds, security
 
@@ -26,21 +42,78 @@ router_user = APIRouter(
 )
 
 
-@router_user.get("/", response_model=List[schemas.User], dependencies=[Depends(security.get_current_active_user)])
+@router_user.get(
+    "/",
+    response_model=List[schemas.UserWithGroups],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(security.get_current_active_principal)]
+)
 def read_users(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 25
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
 ) -> Any:
     """
     Retrieve users.
     """
-    users = cruds.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    include = parse_include(include, cruds.user.includes)
+    fields = parse_fields(fields, schemas.User)
+    filters = parse_filters(filters, cruds.user.filter_columns())
+    sort = parse_sort(sort, cruds.user.sortable)
+    if not include and has_if_none_match(request):
+        versions = cruds.user.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    users = cruds.user.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        include=include,
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(users, limit, sort))
+    total = cruds.user.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    if not include:
+        set_etag(request, response, [(user.id, user.version) for user in users])
+    if settings.fast_responses or fields:
+        return fast_response(response, users, trimmed_schema(schemas.UserWithGroups, fields), include)
+    return [serialize(user, schemas.UserWithGroups, include) for user in users]
+
+
+@router_user.get("/export", dependencies=[Depends(security.get_current_active_principal)])
+def export_users(
+    db: Session = Depends(get_read_db),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+) -> Any:
+    """
+    Export every user as ndjson or csv, streamed from a server-side cursor.
+    """
+    columns = export_columns(schemas.User, cruds.user.model.__table__)
+    batches = cruds.user.stream(db, columns=columns, batch_size=settings.export_batch_size)
+    return StreamingResponse(
+        export_chunks(format, columns, batches),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
 
 
 @router_user.post("/", response_model=schemas.User)
-def create_user(
+async def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: schemas.UserCreate
@@ -48,35 +121,120 @@ def create_user(
     """
     Create new user.
     """
-    user = cruds.user.get_by_email(db, email=user_in.email)
+    # Apenas as consultas usam o threadpool, o bcrypt roda no pool de hash de senha
+    user = await run_in_threadpool(cruds.user.get_by_email, db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=403,
             detail="The user with this username already exists in the system.",
         )
-    user = cruds.user.create(db, obj_in=user_in)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_in_threadpool(cruds.user.create, db, obj_in=user_in, hashed_password=hashed_password)
     return user
 
 
-@router_user.get("/{user_id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_user)])
+@router_user.post("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal)])
+async def create_users_bulk(
+    *,
+    db: Session = Depends(get_db),
+    users_in: schemas.UserCreateBulk
+) -> Any:
+    """
+    Create many users in one transaction, with one result per item.
+    """
+    existing = await run_in_threadpool(
+        cruds.user.get_multi_by_email, db, emails=[user_in.email for user_in in users_in]
+    )
+    emails = {user.email for user in existing}
+    results: List[Dict[str, Any]] = []
+    to_create = []
+    for index, user_in in enumerate(users_in):
+        if user_in.email in emails:
+            results.append({
+                "index": index,
+                "status": 403,
+                "detail": "The user with this username already exists in the system.",
+            })
+            continue
+        emails.add(user_in.email)
+        to_create.append(index)
+        results.append({"index": index, "status": 200})
+    objs_in = [users_in[index] for index in to_create]
+    hashed_passwords = await get_password_hashes_async([obj_in.password for obj_in in objs_in])
+    users = await run_in_threadpool(cruds.user.create_multi, db, objs_in=objs_in, hashed_passwords=hashed_passwords)
+    for index, user in zip(to_create, users):
+        results[index]["data"] = user
+    return results
+
+
+@router_user.put("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal)])
+async def update_users_bulk(
+    *,
+    db: Session = Depends(get_db),
+    users_in: schemas.UserUpdateBulk
+) -> Any:
+    """
+    Update many users in one transaction, with one result per item.
+    """
+    hashed_passwords = await get_password_hashes_async([user_in.password for user_in in users_in if user_in.password])
+    users = await run_in_threadpool(cruds.user.update_multi, db, objs_in=users_in, hashed_passwords=hashed_passwords)
+    return bulk_results(
+        [user_in.id for user_in in users_in], users, "The user with this id does not exist in the system"
+    )
+
+
+@router_user.delete("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal)])
+def delete_users_bulk(
+    *,
+    db: Session = Depends(get_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many users in one transaction, with one result per item.
+    """
+    users = cruds.user.remove_multi(db, ids=ids)
+    return bulk_results(ids, users, "The user with this id does not exist in the system")
+
+
+@router_user.get(
+    "/{user_id}",
+    response_model=schemas.UserWithGroups,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(security.get_current_active_principal)]
+)
 def read_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    include: Optional[str] = None,
+    fields: Optional[str] = None
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = cruds.user.get(db, id=user_id)
+    include = parse_include(include, cruds.user.includes)
+    fields = parse_fields(fields, schemas.User)
+    if not include and has_if_none_match(request):
+        not_modified_response = not_modified(request, cruds.user.get_version(db, id=user_id))
+        if not_modified_response:
+            return not_modified_response
+    user = cruds.user.get(db, id=user_id, include=include, fields=fields)
     if not user:
       raise HTTPException(
           status_code=404,
           detail="The user with this id does not exist in the system",
       )
-    return user
+    if not include:
+        set_etag(request, response, user.version)
+    if fields:
+        schema = trimmed_schema(schemas.UserWithGroups, fields)
+        return fast_response(response, user, schema, include, many=False)
+    return serialize(user, schemas.UserWithGroups, include)
 
 
-@router_user.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_user)])
-def update_user(
+@router_user.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_principal)])
+async def update_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
@@ -85,16 +243,19 @@ def update_user(
     """
     Update a user.
     """
-    user = cruds.user.get(db, id=user_id)
+    user = await run_in_threadpool(cruds.user.get, db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
-    user = cruds.user.update(db, db_obj=user, obj_in=user_in)
+    hashed_password = None
+    if 'password' in user_in.dict(exclude_unset=True):
+        hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_in_threadpool(cruds.user.update, db, db_obj=user, obj_in=user_in, hashed_password=hashed_password)
     return user
 
-@router_user.delete("/{id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_user)])
+@router_user.delete("/{id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_principal)])
 def delete_note(
     *,
     db: Session = Depends(get_db),
@@ -103,13 +264,12 @@ def delete_note(
     """
     Delete an note.
     """
-    user = cruds.user.get(db=db, id=id)
+    user = cruds.user.remove(db=db, id=id, returning=True)
     if not user:
       raise HTTPException(
         status_code=404,
         detail="The user with this id does not exist in the system",
       )
-    user = cruds.user.remove(db=db, id=id)
     return user
 
 
@@ -118,28 +278,79 @@ router_auth = APIRouter(
 )
 
 @router_auth.post("/login", response_model=schemas.UserToken)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = cruds.user.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
-    if not user:
+    # Apenas as consultas usam o threadpool, o bcrypt roda no pool de hash de senha
+    user = await run_in_threadpool(cruds.user.get_by_email, db, email=form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.password):
         raise HTTPException(status_code=403, detail="Incorrect email or password")
     elif not cruds.user.is_active(user):
         raise HTTPException(status_code=403, detail="Inactive user")
+    permissions = None
+    if settings.token_permissions:
+        permissions = await run_in_threadpool(cruds.user.get_permission_names, db, user_id=user.id)
     return {
         **user.__dict__,
         "access_token": create_access_token(
-            user.id
+            user.id, permissions=permissions
         ),
+        "refresh_token": create_refresh_token(user.id),
         "token_type": "bearer",
     }
 
+
+@router_auth.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(
+    *,
+    db: Session = Depends(get_db),
+    token_in: schemas.RefreshToken
+) -> Any:
+    """
+    Get a new access token and refresh token, the refresh token used is revoked
+    """
+    token_data = security.get_refresh_token_data(token_in.refresh_token)
+    user = cruds.user.get(db, id=token_data.sub)
+    if not user or not cruds.user.is_active(user):
+        raise HTTPException(status_code=403, detail="Inactive user")
+    try:
+        cruds.revoked_token.revoke(db, token_data=token_data)
+    except IntegrityError:
+        # O mesmo refresh token usado em duas requisições ao mesmo tempo: só a primeira revoga e recebe tokens novos
+        db.rollback()
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+        )
+    permissions = None
+    if settings.token_permissions:
+        permissions = cruds.user.get_permission_names(db, user_id=user.id)
+    return {
+        "access_token": create_access_token(user.id, permissions=permissions),
+        "refresh_token": create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+
+@router_auth.post("/logout", status_code=204)
+def logout(
+    *,
+    db: Session = Depends(get_db),
+    token_data: schemas.TokenPayload = Depends(security.get_token_data),
+    token_in: Optional[schemas.RefreshToken] = None
+) -> Any:
+    """
+    Revoke the access token and, when given, the refresh token
+    """
+    cruds.revoked_token.revoke(db, token_data=token_data)
+    if token_in is not None:
+        cruds.revoked_token.revoke(db, token_data=security.get_refresh_token_data(token_in.refresh_token))
+    return Response(status_code=204)
+
 @router_auth.get("/profile", response_model=schemas.User)
 def read_user_me(
     current_user: schemas.User = Depends(security.get_current_active_user),
@@ -162,7 +373,9 @@ def update_user_me(
     """
     Update own user.
     """
+    # Sem a senha: o hash salvo não é re-hasheado e o endpoint não usa o bcrypt
     current_user_data = jsonable_encoder(current_user)
+    current_user_data.pop("password", None)
     user_in = schemas.UserUpdate(**current_user_data)
     if first_name is not None:
         user_in.first_name = first_name
@@ -179,24 +392,56 @@ def update_user_me(
 router_permission = APIRouter(
     prefix="/permisions",
     tags=['permisions'],
-    dependencies=[Depends(security.get_current_active_user)]
+    dependencies=[Depends(security.get_current_active_principal)]
 )
 
 
 @router_permission.get(
-    "/", 
-    response_model=List[schemas.Permission], 
-    dependencies=[Depends(security.has_permission("authentication.permission_view"))]
+    "/",
+    response_model=List[schemas.Permission],
+    # Sem as permissões do token: uma permissão removida é negada na hora
+    dependencies=[Depends(security.has_permission("authentication.permission_view", fresh=True))]
 )
 def read_permissions(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 25
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
 ) -> Any:
     """
     Retrieve permissions.
     """
-    permissions = cruds.permission.get_multi(db, skip=skip, limit=limit)
+    fields = parse_fields(fields, schemas.Permission)
+    filters = parse_filters(filters, cruds.permission.filter_columns())
+    sort = parse_sort(sort, cruds.permission.sortable)
+    if has_if_none_match(request):
+        versions = cruds.permission.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    permissions = cruds.permission.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(permissions, limit, sort))
+    total = cruds.permission.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    set_etag(request, response, [(permission.id, permission.version) for permission in permissions])
+    if settings.fast_responses or fields:
+        return fast_response(response, permissions, trimmed_schema(schemas.Permission, fields))
     return permissions
 
 
@@ -209,24 +454,98 @@ def create_permission(
     """
     Create new permission.
     """
+    if cruds.permission.get_id_by_name(db, name=permission_in.name) is not None:
+        raise HTTPException(
+            status_code=403,
+            detail="The permission with this name already exists in the system.",
+        )
     permission = cruds.permission.create(db, obj_in=permission_in)
     return permission
 
 
+@router_permission.post("/bulk", response_model=List[schemas.PermissionBulkResult])
+def create_permissions_bulk(
+    *,
+    db: Session = Depends(get_db),
+    permissions_in: schemas.PermissionCreateBulk
+) -> Any:
+    """
+    Create many permissions in one transaction, with one result per item.
+    """
+    names = {
+        permission.name
+        for permission in cruds.permission.get_multi_by_name(db, names=[permission_in.name for permission_in in permissions_in])
+    }
+    results: List[Dict[str, Any]] = []
+    to_create = []
+    for index, permission_in in enumerate(permissions_in):
+        if permission_in.name in names:
+            results.append({
+                "index": index,
+                "status": 403,
+                "detail": "The permission with this name already exists in the system.",
+            })
+            continue
+        names.add(permission_in.name)
+        to_create.append(index)
+        results.append({"index": index, "status": 200})
+    permissions = cruds.permission.create_multi(db, objs_in=[permissions_in[index] for index in to_create])
+    for index, permission in zip(to_create, permissions):
+        results[index]["data"] = permission
+    return results
+
+
+@router_permission.put("/bulk", response_model=List[schemas.PermissionBulkResult])
+def update_permissions_bulk(
+    *,
+    db: Session = Depends(get_db),
+    permissions_in: schemas.PermissionUpdateBulk
+) -> Any:
+    """
+    Update many permissions in one transaction, with one result per item.
+    """
+    permissions = cruds.permission.update_multi(db, objs_in=permissions_in)
+    return bulk_results([permission_in.id for permission_in in permissions_in], permissions, "The permission does not exist in the system")
+
+
+@router_permission.delete("/bulk", response_model=List[schemas.PermissionBulkResult])
+def delete_permissions_bulk(
+    *,
+    db: Session = Depends(get_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many permissions in one transaction, with one result per item.
+    """
+    permissions = cruds.permission.remove_multi(db, ids=ids)
+    return bulk_results(ids, permissions, "The permission does not exist in the system")
+
+
 @router_permission.get("/{permission_id}", response_model=schemas.Permission)
 def read_permission_by_id(
     permission_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    fields: Optional[str] = None
 ) -> Any:
     """
     Get a specific permission by id.
     """
-    permission = cruds.permission.get(db, id=permission_id)
+    fields = parse_fields(fields, schemas.Permission)
+    if has_if_none_match(request):
+        not_modified_response = not_modified(request, cruds.permission.get_version(db, id=permission_id))
+        if not_modified_response:
+            return not_modified_response
+    permission = cruds.permission.get(db, id=permission_id, fields=fields)
     if not permission:
       raise HTTPException(
           status_code=404,
           detail="The permission does not exist in the system",
       )
+    set_etag(request, response, permission.version)
+    if fields:
+        return fast_response(response, permission, trimmed_schema(schemas.Permission, fields), many=False)
     return permission
 
 
@@ -258,13 +577,12 @@ def delete_permission(
     """
     Delete an note.
     """
-    permission = cruds.permission.get(db=db, id=id)
+    permission = cruds.permission.remove(db=db, id=id, returning=True)
     if not permission:
       raise HTTPException(
         status_code=404,
         detail="The permission does not exist in the system",
       )
-    permission = cruds.permission.remove(db=db, id=id)
     return permission
 
 
@@ -274,21 +592,60 @@ def delete_permission(
 router_group = APIRouter(
     prefix="/groups",
     tags=['groups'],
-    dependencies=[Depends(security.get_current_active_user)]
+    dependencies=[Depends(security.get_current_active_principal)]
 )
 
 
-@router_group.get("/", response_model=List[schemas.Group])
+@router_group.get(
+    "/",
+    response_model=List[schemas.GroupWithPermissions],
+    response_model_exclude_unset=True
+)
 def read_groups(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 25
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
 ) -> Any:
     """
     Retrieve groups.
     """
-    groups = cruds.group.get_multi(db, skip=skip, limit=limit)
-    return groups
+    include = parse_include(include, cruds.group.includes)
+    fields = parse_fields(fields, schemas.Group)
+    filters = parse_filters(filters, cruds.group.filter_columns())
+    sort = parse_sort(sort, cruds.group.sortable)
+    if not include and has_if_none_match(request):
+        versions = cruds.group.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    groups = cruds.group.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        include=include,
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(groups, limit, sort))
+    total = cruds.group.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    if not include:
+        set_etag(request, response, [(group.id, group.version) for group in groups])
+    if settings.fast_responses or fields:
+        return fast_response(response, groups, trimmed_schema(schemas.GroupWithPermissions, fields), include)
+    return [serialize(group, schemas.GroupWithPermissions, include) for group in groups]
 
 
 @router_group.post("/", response_model=schemas.Group)
@@ -304,21 +661,79 @@ def create_group(
     return group
 
 
-@router_group.get("/{group_id}", response_model=schemas.Group)
+@router_group.post("/bulk", response_model=List[schemas.GroupBulkResult])
+def create_groups_bulk(
+    *,
+    db: Session = Depends(get_db),
+    groups_in: schemas.GroupCreateBulk
+) -> Any:
+    """
+    Create many groups in one transaction, with one result per item.
+    """
+    groups = cruds.group.create_multi(db, objs_in=groups_in)
+    return [{"index": index, "status": 200, "data": group} for index, group in enumerate(groups)]
+
+
+@router_group.put("/bulk", response_model=List[schemas.GroupBulkResult])
+def update_groups_bulk(
+    *,
+    db: Session = Depends(get_db),
+    groups_in: schemas.GroupUpdateBulk
+) -> Any:
+    """
+    Update many groups in one transaction, with one result per item.
+    """
+    groups = cruds.group.update_multi(db, objs_in=groups_in)
+    return bulk_results([group_in.id for group_in in groups_in], groups, "The group does not exist in the system")
+
+
+@router_group.delete("/bulk", response_model=List[schemas.GroupBulkResult])
+def delete_groups_bulk(
+    *,
+    db: Session = Depends(get_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many groups in one transaction, with one result per item.
+    """
+    groups = cruds.group.remove_multi(db, ids=ids)
+    return bulk_results(ids, groups, "The group does not exist in the system")
+
+
+@router_group.get(
+    "/{group_id}",
+    response_model=schemas.GroupWithPermissions,
+    response_model_exclude_unset=True
+)
 def read_group_by_id(
     group_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    include: Optional[str] = None,
+    fields: Optional[str] = None
 ) -> Any:
     """
     Get a specific group by id.
     """
-    group = cruds.group.get(db, id=group_id)
+    include = parse_include(include, cruds.group.includes)
+    fields = parse_fields(fields, schemas.Group)
+    if not include and has_if_none_match(request):
+        not_modified_response = not_modified(request, cruds.group.get_version(db, id=group_id))
+        if not_modified_response:
+            return not_modified_response
+    group = cruds.group.get(db, id=group_id, include=include, fields=fields)
     if not group:
       raise HTTPException(
           status_code=404,
           detail="The group does not exist in the system",
       )
-    return group
+    if not include:
+        set_etag(request, response, group.version)
+    if fields:
+        schema = trimmed_schema(schemas.GroupWithPermissions, fields)
+        return fast_response(response, group, schema, include, many=False)
+    return serialize(group, schemas.GroupWithPermissions, include)
 
 
 @router_group.put("/{group_id}", response_model=schemas.Group)
@@ -349,13 +764,12 @@ def delete_note(
     """
     Delete an note.
     """
-    group = cruds.group.get(db=db, id=id)
+    group = cruds.group.remove(db=db, id=id, returning=True)
     if not group:
       raise HTTPException(
         status_code=404,
         detail="The group does not exist in the system",
       )
-    group = cruds.group.remove(db=db, id=id)
     return group
 
 
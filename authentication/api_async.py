@@ -0,0 +1,766 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic.networks import EmailStr
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from core.bulk import bulk_results
+from core.config import settings
+from core.database import get_async_db
+from core.etag import has_if_none_match, not_modified, set_etag
+from core.export import EXPORT_FORMATS, export_columns, export_chunks_async
+from core.fields import parse_fields, trimmed_schema
+from core.filters import parse_filters, parse_sort
+from core.includes import parse_include
+from core.pagination import decode_cursor, next_cursor, set_pagination_headers, set_total_count
+from core.replicas import get_async_read_db
+from core.responses import fast_response, serialize
+from core.security import create_access_token, create_refresh_token
+
+from authentication import schemas, cruds, security
+
+'''
+Arquivos com os endpoints async da app
+
+- Mesmos endpoints do arquivo api.py, porém usando AsyncSession
+- Habilitado com ASYNC_ROUTERS=true no .env
+'''
+
+router_user = APIRouter(
+    prefix="/users",
+    tags=['users']
+)
+
+
+@router_user.get(
+    "/",
+    response_model=List[schemas.UserWithGroups],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(security.get_current_active_principal_async)]
+)
+async def read_users(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
+) -> Any:
+    """
+    Retrieve users.
+    """
+    include = parse_include(include, cruds.user_async.includes)
+    fields = parse_fields(fields, schemas.User)
+    filters = parse_filters(filters, cruds.user_async.filter_columns())
+    sort = parse_sort(sort, cruds.user_async.sortable)
+    if not include and has_if_none_match(request):
+        versions = await cruds.user_async.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    users = await cruds.user_async.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        include=include,
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(users, limit, sort))
+    total = await cruds.user_async.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    if not include:
+        set_etag(request, response, [(user.id, user.version) for user in users])
+    if settings.fast_responses or fields:
+        return fast_response(response, users, trimmed_schema(schemas.UserWithGroups, fields), include)
+    return [serialize(user, schemas.UserWithGroups, include) for user in users]
+
+
+@router_user.get("/export", dependencies=[Depends(security.get_current_active_principal_async)])
+async def export_users(
+    db: AsyncSession = Depends(get_async_read_db),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+) -> Any:
+    """
+    Export every user as ndjson or csv, streamed from a server-side cursor.
+    """
+    columns = export_columns(schemas.User, cruds.user.model.__table__)
+    batches = cruds.user_async.stream(db, columns=columns, batch_size=settings.export_batch_size)
+    return StreamingResponse(
+        export_chunks_async(format, columns, batches),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router_user.post("/", response_model=schemas.User)
+async def create_user(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    user_in: schemas.UserCreate
+) -> Any:
+    """
+    Create new user.
+    """
+    user = await cruds.user_async.get_by_email(db, email=user_in.email)
+    if user:
+        raise HTTPException(
+            status_code=403,
+            detail="The user with this username already exists in the system.",
+        )
+    user = await cruds.user_async.create(db, obj_in=user_in)
+    return user
+
+
+@router_user.post("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal_async)])
+async def create_users_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    users_in: schemas.UserCreateBulk
+) -> Any:
+    """
+    Create many users in one transaction, with one result per item.
+    """
+    emails = {user.email for user in await cruds.user_async.get_multi_by_email(db, emails=[user_in.email for user_in in users_in])}
+    results: List[Dict[str, Any]] = []
+    to_create = []
+    for index, user_in in enumerate(users_in):
+        if user_in.email in emails:
+            results.append({
+                "index": index,
+                "status": 403,
+                "detail": "The user with this username already exists in the system.",
+            })
+            continue
+        emails.add(user_in.email)
+        to_create.append(index)
+        results.append({"index": index, "status": 200})
+    users = await cruds.user_async.create_multi(db, objs_in=[users_in[index] for index in to_create])
+    for index, user in zip(to_create, users):
+        results[index]["data"] = user
+    return results
+
+
+@router_user.put("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal_async)])
+async def update_users_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    users_in: schemas.UserUpdateBulk
+) -> Any:
+    """
+    Update many users in one transaction, with one result per item.
+    """
+    users = await cruds.user_async.update_multi(db, objs_in=users_in)
+    return bulk_results(
+        [user_in.id for user_in in users_in], users, "The user with this id does not exist in the system"
+    )
+
+
+@router_user.delete("/bulk", response_model=List[schemas.UserBulkResult], dependencies=[Depends(security.get_current_active_principal_async)])
+async def delete_users_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many users in one transaction, with one result per item.
+    """
+    users = await cruds.user_async.remove_multi(db, ids=ids)
+    return bulk_results(ids, users, "The user with this id does not exist in the system")
+
+
+@router_user.get(
+    "/{user_id}",
+    response_model=schemas.UserWithGroups,
+    response_model_exclude_unset=True,
+    dependencies=[Depends(security.get_current_active_principal_async)]
+)
+async def read_user_by_id(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    include: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Any:
+    """
+    Get a specific user by id.
+    """
+    include = parse_include(include, cruds.user_async.includes)
+    fields = parse_fields(fields, schemas.User)
+    if not include and has_if_none_match(request):
+        not_modified_response = not_modified(request, await cruds.user_async.get_version(db, id=user_id))
+        if not_modified_response:
+            return not_modified_response
+    user = await cruds.user_async.get(db, id=user_id, include=include, fields=fields)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this id does not exist in the system",
+        )
+    if not include:
+        set_etag(request, response, user.version)
+    if fields:
+        schema = trimmed_schema(schemas.UserWithGroups, fields)
+        return fast_response(response, user, schema, include, many=False)
+    return serialize(user, schemas.UserWithGroups, include)
+
+
+@router_user.put("/{user_id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_principal_async)])
+async def update_user(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int,
+    user_in: schemas.UserUpdate
+) -> Any:
+    """
+    Update a user.
+    """
+    user = await cruds.user_async.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this id does not exist in the system",
+        )
+    user = await cruds.user_async.update(db, db_obj=user, obj_in=user_in)
+    return user
+
+@router_user.delete("/{id}", response_model=schemas.User, dependencies=[Depends(security.get_current_active_principal_async)])
+async def delete_user(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    id: int
+) -> Any:
+    """
+    Delete a user.
+    """
+    user = await cruds.user_async.remove(db=db, id=id, returning=True)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this id does not exist in the system",
+        )
+    return user
+
+
+router_auth = APIRouter(
+     tags=['auth']
+)
+
+@router_auth.post("/login", response_model=schemas.UserToken)
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
+    form_data: OAuth2PasswordRequestForm = Depends()
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    user = await cruds.user_async.authenticate(
+        db, email=form_data.username, password=form_data.password
+    )
+    if not user:
+        raise HTTPException(status_code=403, detail="Incorrect email or password")
+    elif not cruds.user_async.is_active(user):
+        raise HTTPException(status_code=403, detail="Inactive user")
+    permissions = None
+    if settings.token_permissions:
+        permissions = await cruds.user_async.get_permission_names(db, user_id=user.id)
+    return {
+        **user.__dict__,
+        "access_token": create_access_token(
+            user.id, permissions=permissions
+        ),
+        "refresh_token": create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+
+@router_auth.post("/refresh", response_model=schemas.Token)
+async def refresh_access_token(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    token_in: schemas.RefreshToken
+) -> Any:
+    """
+    Get a new access token and refresh token, the refresh token used is revoked
+    """
+    token_data = security.get_refresh_token_data(token_in.refresh_token)
+    user = await cruds.user_async.get(db, id=token_data.sub)
+    if not user or not cruds.user_async.is_active(user):
+        raise HTTPException(status_code=403, detail="Inactive user")
+    try:
+        await cruds.revoked_token_async.revoke(db, token_data=token_data)
+    except IntegrityError:
+        # O mesmo refresh token usado em duas requisições ao mesmo tempo: só a primeira revoga e recebe tokens novos
+        await db.rollback()
+        raise HTTPException(
+            status_code=401,
+            detail="Could not validate credentials",
+        )
+    permissions = None
+    if settings.token_permissions:
+        permissions = await cruds.user_async.get_permission_names(db, user_id=user.id)
+    return {
+        "access_token": create_access_token(user.id, permissions=permissions),
+        "refresh_token": create_refresh_token(user.id),
+        "token_type": "bearer",
+    }
+
+
+@router_auth.post("/logout", status_code=204)
+async def logout(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    token_data: schemas.TokenPayload = Depends(security.get_token_data),
+    token_in: Optional[schemas.RefreshToken] = None
+) -> Any:
+    """
+    Revoke the access token and, when given, the refresh token
+    """
+    await cruds.revoked_token_async.revoke(db, token_data=token_data)
+    if token_in is not None:
+        await cruds.revoked_token_async.revoke(db, token_data=security.get_refresh_token_data(token_in.refresh_token))
+    return Response(status_code=204)
+
+@router_auth.get("/profile", response_model=schemas.User)
+async def read_user_me(
+    current_user: schemas.User = Depends(security.get_current_active_user_async),
+) -> Any:
+    """
+    Get current user.
+    """
+    return current_user
+
+
+@router_auth.put("/profile", response_model=schemas.User)
+async def update_user_me(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    first_name: str = Body(None),
+    last_name: str = Body(None),
+    email: EmailStr = Body(None),
+    current_user: schemas.User = Depends(security.get_current_active_user_async),
+) -> Any:
+    """
+    Update own user.
+    """
+    # Sem a senha: o hash salvo não é re-hasheado e o endpoint não usa o bcrypt
+    current_user_data = jsonable_encoder(current_user)
+    current_user_data.pop("password", None)
+    user_in = schemas.UserUpdate(**current_user_data)
+    if first_name is not None:
+        user_in.first_name = first_name
+    if last_name is not None:
+        user_in.last_name = last_name
+    if email is not None:
+        user_in.email = email
+    user = await cruds.user_async.update(db, db_obj=current_user, obj_in=user_in)
+    return user
+
+
+
+
+router_permission = APIRouter(
+    prefix="/permisions",
+    tags=['permisions'],
+    dependencies=[Depends(security.get_current_active_principal_async)]
+)
+
+
+@router_permission.get(
+    "/",
+    response_model=List[schemas.Permission],
+    # Sem as permissões do token: uma permissão removida é negada na hora
+    dependencies=[Depends(security.has_permission_async("authentication.permission_view", fresh=True))]
+)
+async def read_permissions(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
+) -> Any:
+    """
+    Retrieve permissions.
+    """
+    fields = parse_fields(fields, schemas.Permission)
+    filters = parse_filters(filters, cruds.permission_async.filter_columns())
+    sort = parse_sort(sort, cruds.permission_async.sortable)
+    if has_if_none_match(request):
+        versions = await cruds.permission_async.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    permissions = await cruds.permission_async.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(permissions, limit, sort))
+    total = await cruds.permission_async.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    set_etag(request, response, [(permission.id, permission.version) for permission in permissions])
+    if settings.fast_responses or fields:
+        return fast_response(response, permissions, trimmed_schema(schemas.Permission, fields))
+    return permissions
+
+
+@router_permission.post("/", response_model=schemas.Permission)
+async def create_permission(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    permission_in: schemas.PermissionCreate
+) -> Any:
+    """
+    Create new permission.
+    """
+    if await cruds.permission_async.get_id_by_name(db, name=permission_in.name) is not None:
+        raise HTTPException(
+            status_code=403,
+            detail="The permission with this name already exists in the system.",
+        )
+    permission = await cruds.permission_async.create(db, obj_in=permission_in)
+    return permission
+
+
+@router_permission.post("/bulk", response_model=List[schemas.PermissionBulkResult])
+async def create_permissions_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    permissions_in: schemas.PermissionCreateBulk
+) -> Any:
+    """
+    Create many permissions in one transaction, with one result per item.
+    """
+    names = {
+        permission.name
+        for permission in await cruds.permission_async.get_multi_by_name(db, names=[permission_in.name for permission_in in permissions_in])
+    }
+    results: List[Dict[str, Any]] = []
+    to_create = []
+    for index, permission_in in enumerate(permissions_in):
+        if permission_in.name in names:
+            results.append({
+                "index": index,
+                "status": 403,
+                "detail": "The permission with this name already exists in the system.",
+            })
+            continue
+        names.add(permission_in.name)
+        to_create.append(index)
+        results.append({"index": index, "status": 200})
+    permissions = await cruds.permission_async.create_multi(db, objs_in=[permissions_in[index] for index in to_create])
+    for index, permission in zip(to_create, permissions):
+        results[index]["data"] = permission
+    return results
+
+
+@router_permission.put("/bulk", response_model=List[schemas.PermissionBulkResult])
+async def update_permissions_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    permissions_in: schemas.PermissionUpdateBulk
+) -> Any:
+    """
+    Update many permissions in one transaction, with one result per item.
+    """
+    permissions = await cruds.permission_async.update_multi(db, objs_in=permissions_in)
+    return bulk_results([permission_in.id for permission_in in permissions_in], permissions, "The permission does not exist in the system")
+
+
+@router_permission.delete("/bulk", response_model=List[schemas.PermissionBulkResult])
+async def delete_permissions_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many permissions in one transaction, with one result per item.
+    """
+    permissions = await cruds.permission_async.remove_multi(db, ids=ids)
+    return bulk_results(ids, permissions, "The permission does not exist in the system")
+
+
+@router_permission.get("/{permission_id}", response_model=schemas.Permission)
+async def read_permission_by_id(
+    permission_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    fields: Optional[str] = None
+) -> Any:
+    """
+    Get a specific permission by id.
+    """
+    fields = parse_fields(fields, schemas.Permission)
+    if has_if_none_match(request):
+        not_modified_response = not_modified(request, await cruds.permission_async.get_version(db, id=permission_id))
+        if not_modified_response:
+            return not_modified_response
+    permission = await cruds.permission_async.get(db, id=permission_id, fields=fields)
+    if not permission:
+        raise HTTPException(
+            status_code=404,
+            detail="The permission does not exist in the system",
+        )
+    set_etag(request, response, permission.version)
+    if fields:
+        return fast_response(response, permission, trimmed_schema(schemas.Permission, fields), many=False)
+    return permission
+
+
+@router_permission.put("/{permission_id}", response_model=schemas.Permission)
+async def update_permission(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    permission_id: int,
+    permission_in: schemas.PermissionUpdate
+) -> Any:
+    """
+    Update a permission.
+    """
+    permission = await cruds.permission_async.get(db, id=permission_id)
+    if not permission:
+        raise HTTPException(
+            status_code=404,
+            detail="The permission does not exist in the system",
+        )
+    permission = await cruds.permission_async.update(db, db_obj=permission, obj_in=permission_in)
+    return permission
+
+@router_permission.delete("/{id}", response_model=schemas.Permission)
+async def delete_permission(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    id: int
+) -> Any:
+    """
+    Delete a permission.
+    """
+    permission = await cruds.permission_async.remove(db=db, id=id, returning=True)
+    if not permission:
+        raise HTTPException(
+            status_code=404,
+            detail="The permission does not exist in the system",
+        )
+    return permission
+
+
+
+
+
+router_group = APIRouter(
+    prefix="/groups",
+    tags=['groups'],
+    dependencies=[Depends(security.get_current_active_principal_async)]
+)
+
+
+@router_group.get(
+    "/",
+    response_model=List[schemas.GroupWithPermissions],
+    response_model_exclude_unset=True
+)
+async def read_groups(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 25,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: List[str] = Query([], alias="filter"),
+    sort: Optional[str] = None,
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
+) -> Any:
+    """
+    Retrieve groups.
+    """
+    include = parse_include(include, cruds.group_async.includes)
+    fields = parse_fields(fields, schemas.Group)
+    filters = parse_filters(filters, cruds.group_async.filter_columns())
+    sort = parse_sort(sort, cruds.group_async.sortable)
+    if not include and has_if_none_match(request):
+        versions = await cruds.group_async.get_multi_versions(
+            db, skip=skip, limit=limit, cursor=decode_cursor(cursor), filters=filters, sort=sort
+        )
+        not_modified_response = not_modified(request, versions)
+        if not_modified_response:
+            return not_modified_response
+    groups = await cruds.group_async.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=decode_cursor(cursor),
+        include=include,
+        fields=fields,
+        filters=filters,
+        sort=sort,
+    )
+    set_pagination_headers(request, response, next_cursor(groups, limit, sort))
+    total = await cruds.group_async.count(db, mode=count or settings.count_mode, filters=filters)
+    set_total_count(response, total)
+    if not include:
+        set_etag(request, response, [(group.id, group.version) for group in groups])
+    if settings.fast_responses or fields:
+        return fast_response(response, groups, trimmed_schema(schemas.GroupWithPermissions, fields), include)
+    return [serialize(group, schemas.GroupWithPermissions, include) for group in groups]
+
+
+@router_group.post("/", response_model=schemas.Group)
+async def create_group(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    group_in: schemas.GroupCreate
+) -> Any:
+    """
+    Create new group.
+    """
+    group = await cruds.group_async.create(db, obj_in=group_in)
+    return group
+
+
+@router_group.post("/bulk", response_model=List[schemas.GroupBulkResult])
+async def create_groups_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    groups_in: schemas.GroupCreateBulk
+) -> Any:
+    """
+    Create many groups in one transaction, with one result per item.
+    """
+    groups = await cruds.group_async.create_multi(db, objs_in=groups_in)
+    return [{"index": index, "status": 200, "data": group} for index, group in enumerate(groups)]
+
+
+@router_group.put("/bulk", response_model=List[schemas.GroupBulkResult])
+async def update_groups_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    groups_in: schemas.GroupUpdateBulk
+) -> Any:
+    """
+    Update many groups in one transaction, with one result per item.
+    """
+    groups = await cruds.group_async.update_multi(db, objs_in=groups_in)
+    return bulk_results([group_in.id for group_in in groups_in], groups, "The group does not exist in the system")
+
+
+@router_group.delete("/bulk", response_model=List[schemas.GroupBulkResult])
+async def delete_groups_bulk(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    ids: schemas.IdsBulk = Body(...)
+) -> Any:
+    """
+    Delete many groups in one transaction, with one result per item.
+    """
+    groups = await cruds.group_async.remove_multi(db, ids=ids)
+    return bulk_results(ids, groups, "The group does not exist in the system")
+
+
+@router_group.get(
+    "/{group_id}",
+    response_model=schemas.GroupWithPermissions,
+    response_model_exclude_unset=True
+)
+async def read_group_by_id(
+    group_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    include: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Any:
+    """
+    Get a specific group by id.
+    """
+    include = parse_include(include, cruds.group_async.includes)
+    fields = parse_fields(fields, schemas.Group)
+    if not include and has_if_none_match(request):
+        not_modified_response = not_modified(request, await cruds.group_async.get_version(db, id=group_id))
+        if not_modified_response:
+            return not_modified_response
+    group = await cruds.group_async.get(db, id=group_id, include=include, fields=fields)
+    if not group:
+        raise HTTPException(
+            status_code=404,
+            detail="The group does not exist in the system",
+        )
+    if not include:
+        set_etag(request, response, group.version)
+    if fields:
+        schema = trimmed_schema(schemas.GroupWithPermissions, fields)
+        return fast_response(response, group, schema, include, many=False)
+    return serialize(group, schemas.GroupWithPermissions, include)
+
+
+@router_group.put("/{group_id}", response_model=schemas.Group)
+async def update_group(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    group_id: int,
+    group_in: schemas.GroupUpdate
+) -> Any:
+    """
+    Update a group.
+    """
+    group = await cruds.group_async.get(db, id=group_id)
+    if not group:
+        raise HTTPException(
+            status_code=404,
+            detail="The group does not exist in the system",
+        )
+    group = await cruds.group_async.update(db, db_obj=group, obj_in=group_in)
+    return group
+
+@router_group.delete("/{id}", response_model=schemas.Group)
+async def delete_group(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    id: int
+) -> Any:
+    """
+    Delete a group.
+    """
+    group = await cruds.group_async.remove(db=db, id=id, returning=True)
+    if not group:
+        raise HTTPException(
+            status_code=404,
+            detail="The group does not exist in the system",
+        )
+    return group
+
+
+
+router = APIRouter()
+router.include_router(router_user)
+router.include_router(router_auth)
+router.include_router(router_permission)
+router.include_router(router_group)
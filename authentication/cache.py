@@ -0,0 +1,201 @@
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from core.cache import BloomFilter, TTLCache
+from core.config import settings
+
+'''
+Arquivo com os caches em memória da app de autenticação
+
+- principal_cache: usuário autenticado (id, ativo, superusuário e grupos) por id do token (sub)
+- permission_index: permissões de cada usuário, montado a partir de user_group e group_permission
+- token_cache: payload já validado de cada token jwt (pelo sha256 do token) até o seu exp
+- revoked_tokens: ids (jti) dos tokens revogados, carregados do banco ao iniciar o processo e relidos
+  periodicamente pela data de criação, com uma margem para as transações que terminam fora de ordem
+- Os cruds invalidam as entradas ao criar, atualizar ou remover usuários, grupos e permissões
+- Os caches são por processo: com vários workers cada um mantém e invalida o seu, por isso as entradas
+  do principal_cache e do permission_index expiram (ttl) e a escrita feita em outro worker aparece depois disso
+'''
+
+principal_cache = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
+
+def _token_sizeof(key: Hashable, payload: Any) -> int:
+    size = sys.getsizeof(key) + sys.getsizeof(payload) + sys.getsizeof(payload.__dict__)
+    if payload.perms:
+        size += sys.getsizeof(payload.perms) + sum(sys.getsizeof(name) for name in payload.perms)
+    return size
+
+
+token_cache = TTLCache(settings.token_cache_size, 0, sizeof=_token_sizeof)
+
+
+class PermissionIndex:
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        In-memory index of user id -> frozenset of permission ids, resolved lazily per user.
+
+        Identical permission sets are interned so users of the same groups share one set.
+        Every invalidation bumps `version`; a set loaded while the version changed is not
+        stored, so a concurrent write is never hidden by a stale load.
+        Invalidations only reach this process: entries expire after `ttl` seconds so a write
+        made by another worker is seen at most `ttl` seconds later.
+
+        **Parameters**
+
+        * `maxsize`: Maximum number of users kept in the index
+        * `ttl`: Time to live of the permissions of a user and of a permission id by name, in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._permissions: Dict[int, FrozenSet[int]] = {}
+        self._groups: Dict[int, FrozenSet[int]] = {}
+        self._expires: Dict[int, float] = {}
+        self._sets: Dict[FrozenSet[int], FrozenSet[int]] = {}
+        self._names: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._lock = threading.Lock()
+
+    def get_permissions(self, user_id: int) -> Optional[FrozenSet[int]]:
+        permissions = self._permissions.get(user_id)
+        if permissions is not None and self._expires.get(user_id, 0) <= time.monotonic():
+            return None
+        return permissions
+
+    def set_permissions(
+        self, user_id: int, rows: Iterable[Tuple[int, Optional[int]]], version: int
+    ) -> FrozenSet[int]:
+        """
+        Store the (group_id, permission_id) rows of a user loaded at `version`.
+        """
+        rows = list(rows)
+        groups = self._intern(frozenset(group_id for group_id, _ in rows))
+        permissions = self._intern(frozenset(id for _, id in rows if id is not None))
+        with self._lock:
+            if version == self.version:
+                if user_id not in self._permissions and len(self._permissions) >= self.maxsize:
+                    oldest = next(iter(self._permissions))
+                    self._remove(oldest)
+                self._permissions[user_id] = permissions
+                self._groups[user_id] = groups
+                self._expires[user_id] = time.monotonic() + self.ttl
+        return permissions
+
+    def get_permission_id(self, name: str, default: Any = None) -> Any:
+        item = self._names.get(name)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def set_permission_id(self, name: str, id: Optional[int], version: int) -> Optional[int]:
+        with self._lock:
+            if version == self.version:
+                self._names[name] = (time.monotonic() + self.ttl, id)
+        return id
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self.version += 1
+            for user_id in user_ids:
+                self._remove(user_id)
+
+    def invalidate_groups(self, group_ids: Iterable[int]) -> None:
+        group_ids = frozenset(group_ids)
+        with self._lock:
+            self.version += 1
+            for user_id in [user_id for user_id, groups in self._groups.items() if groups & group_ids]:
+                self._remove(user_id)
+
+    def invalidate_permissions(self, permission_ids: Iterable[int]) -> None:
+        permission_ids = frozenset(permission_ids)
+        with self._lock:
+            self.version += 1
+            self._names.clear()
+            for user_id in [
+                user_id for user_id, permissions in self._permissions.items() if permissions & permission_ids
+            ]:
+                self._remove(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._permissions.clear()
+            self._groups.clear()
+            self._expires.clear()
+            self._sets.clear()
+            self._names.clear()
+
+    def _remove(self, user_id: int) -> None:
+        self._permissions.pop(user_id, None)
+        self._groups.pop(user_id, None)
+        self._expires.pop(user_id, None)
+
+    def _intern(self, values: FrozenSet[int]) -> FrozenSet[int]:
+        with self._lock:
+            if len(self._sets) > max(1024, 2 * len(self._permissions)):
+                # Remove os conjuntos que não são mais usados por nenhum usuário
+                in_use = set(self._permissions.values()) | set(self._groups.values())
+                self._sets = {value: value for value in in_use}
+            return self._sets.setdefault(values, values)
+
+    def __len__(self) -> int:
+        return len(self._permissions)
+
+
+permission_index = PermissionIndex(settings.permission_index_size, settings.permission_index_ttl)
+
+
+class RevocationList:
+    def __init__(self, capacity: int):
+        """
+        Ids (jti) of revoked tokens until they expire, checked in O(1) on every request.
+
+        A bloom filter answers most lookups (tokens that were never revoked) without
+        touching the exact set; the exact set removes the filter's false positives.
+
+        **Parameters**
+
+        * `capacity`: Expected number of revoked tokens not yet expired
+        """
+        self.capacity = capacity
+        # Horário do banco no início da última sincronização, None antes da primeira
+        self.synced_at: Optional[datetime] = None
+        self._expires: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity)
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._expires[jti] = expires_at
+            self._bloom.add(jti)
+
+    def load(self, rows: Iterable[Tuple[str, float]], synced_at: datetime) -> None:
+        """
+        Add the (jti, expires_at) rows read from the database by the sync that started at `synced_at`.
+        """
+        for jti, expires_at in rows:
+            self.add(jti, expires_at)
+        self.synced_at = synced_at
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._bloom and jti in self._expires
+
+    def prune(self) -> None:
+        """
+        Forget expired tokens and rebuild the bloom filter, which cannot remove keys.
+        """
+        now = time.time()
+        with self._lock:
+            self._expires = {jti: expires_at for jti, expires_at in self._expires.items() if expires_at > now}
+            self._bloom = BloomFilter(max(self.capacity, 2 * len(self._expires)))
+            for jti in self._expires:
+                self._bloom.add(jti)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+revoked_tokens = RevocationList(settings.revoked_tokens_capacity)
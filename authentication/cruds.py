@@ -1,27 +1,49 @@
-from typing import List, Optional, Union, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
 
+from sqlalchemy import delete, func, select
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from fastapi.encoders import jsonable_encoder
-from core.security import get_password_hash, verify_password
+from core.security import (
+    get_password_hash, get_password_hash_async, get_password_hashes, get_password_hashes_async,
+    verify_password, verify_password_async
+)
 
-from core.cruds import CRUDBase
-from authentication.models import User, Permission, Group
-from authentication.schemas import UserCreate, UserUpdate, PermissionCreate, PermissionUpdate, GroupCreate, GroupUpdate
+from core.config import settings
+from core.cruds import AsyncCRUDBase, CRUDBase
+from authentication.cache import permission_index, principal_cache, revoked_tokens
+from authentication.models import User, Permission, Group, RevokedToken, group_permission, user_group
+from authentication.schemas import (
+    UserCreate, UserUpdate, UserBulkUpdate, PermissionCreate, PermissionUpdate, GroupCreate, GroupUpdate,
+    RevokedTokenCreate, TokenPayload
+)
 
 
 '''
 Arquivo com os cruds de usuário, permissões e grupos
 
 - Cruds herdando do crud base
+- Cruds async herdando do crud base async, usados pelos endpoints async
 '''
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    includes = ("groups", "groups.permissions")
+    filterable = ("email", "username", "is_active", "groups")
+    sortable = ("id", "email", "username")
+    relation_filters = {"groups": (user_group.c.user_id, user_group.c.group_id)}
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
             return db.query(User).filter(User.email == email).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
+    def get_multi_by_email(self, db: Session, *, emails: List[str]) -> List[User]:
+        return db.query(User).filter(User.email.in_(emails)).all()
+
+    def create(self, db: Session, *, obj_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+            if hashed_password is None:
+                hashed_password = get_password_hash(obj_in.password)
             db_obj = User(
                 email=obj_in.email,
-                password=get_password_hash(obj_in.password),
+                password=hashed_password,
                 username=obj_in.username,
                 first_name=obj_in.first_name,
                 last_name=obj_in.last_name,
@@ -33,33 +55,132 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
                 db_obj.groups = groups
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
+            self._invalidate([db_obj.id])
             return db_obj
 
     def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+        self,
+        db: Session,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        hashed_password: Optional[str] = None
     ) -> User:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
         if 'password' in update_data:
-            password = get_password_hash(update_data["password"])
-            del update_data["password"]
-            update_data["password"] = password
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+            if hashed_password is None:
+                hashed_password = get_password_hash(update_data["password"])
+            update_data["password"] = hashed_password
+        self._update_row(db, db_obj=db_obj, update_data=update_data)
         if 'groups' in update_data:
-            db_obj.groups.clear()
-            groups = db.query(Group).filter(Group.id.in_(obj_in.groups)).all()
-            db_obj.groups = groups
-        db.add(db_obj)
+            self._replace_associations(db, db_obj=db_obj, name="groups", ids=update_data['groups'] or ())
         db.commit()
-        db.refresh(db_obj)
+        self._invalidate([db_obj.id])
         return db_obj
 
+    def create_multi(
+        self, db: Session, *, objs_in: List[UserCreate], hashed_passwords: Optional[List[str]] = None
+    ) -> List[User]:
+        if hashed_passwords is None:
+            hashed_passwords = get_password_hashes([obj_in.password for obj_in in objs_in])
+        group_ids = set().union(*(obj_in.groups or set() for obj_in in objs_in))
+        groups = {group.id: group for group in db.query(Group).filter(Group.id.in_(group_ids))} if group_ids else {}
+        db_objs = [
+            User(
+                email=obj_in.email,
+                password=password,
+                username=obj_in.username,
+                first_name=obj_in.first_name,
+                last_name=obj_in.last_name,
+                is_superuser=obj_in.is_superuser,
+                is_active=obj_in.is_active,
+                groups=[groups[id] for id in obj_in.groups or () if id in groups],
+            )
+            for obj_in, password in zip(objs_in, hashed_passwords)
+        ]
+        return self._save_multi(db, db_objs)
+
+    def import_multi(self, db: Session, *, objs_in: List[UserCreate], hashed_passwords: List[str]) -> None:
+        """
+        Insert users with already hashed passwords through `insert_multi` (COPY on PostgreSQL),
+        without building ORM objects (only their ids are read back), then commit.
+        """
+        columns = ["email", "password", "username", "first_name", "last_name", "is_superuser", "is_active"]
+        rows = [
+            {**obj_in.dict(include=set(columns)), "password": password}
+            for obj_in, password in zip(objs_in, hashed_passwords)
+        ]
+        self.insert_multi(db, rows=rows, columns=columns)
+        emails = [row["email"] for row in rows]
+        user_ids = dict(db.execute(select(User.email, User.id).filter(User.email.in_(emails))).all())
+        groups = {obj_in.email: obj_in.groups for obj_in in objs_in if obj_in.groups}
+        if groups:
+            group_ids = set(db.execute(
+                select(Group.id).filter(Group.id.in_(set().union(*groups.values())))
+            ).scalars())
+            self.insert_multi(
+                db,
+                rows=[
+                    {"user_id": user_ids[email], "group_id": group_id}
+                    for email, ids in groups.items() for group_id in ids if group_id in group_ids
+                ],
+                columns=["user_id", "group_id"],
+                table=user_group,
+            )
+        db.commit()
+        self._invalidate(user_ids.values())
+
+    def update_multi(
+        self,
+        db: Session,
+        *,
+        objs_in: List[Union[UserBulkUpdate, Dict[str, Any]]],
+        hashed_passwords: Optional[List[str]] = None
+    ) -> List[User]:
+        """
+        `hashed_passwords`: hashes of the items that have a password, in order (hashed here in parallel when None).
+        """
+        objs_data = [dict(obj_in) if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True) for obj_in in objs_in]
+        with_password = [update_data for update_data in objs_data if update_data.get('password')]
+        if hashed_passwords is None:
+            hashed_passwords = get_password_hashes([update_data['password'] for update_data in with_password])
+        for update_data, password in zip(with_password, hashed_passwords):
+            update_data['password'] = password
+        return super().update_multi(db, objs_in=objs_data)
+
+    def get_permission_names(self, db: Session, *, user_id: int) -> List[str]:
+        return db.execute(self._permissions_statement(user_id)).scalars().all()
+
+    def has_permission(self, db: Session, *, user_id: int, name: str) -> bool:
+        statement = self._permissions_statement(user_id).filter(Permission.name == name).limit(1)
+        return db.execute(statement).first() is not None
+
+    def get_permission_ids(self, db: Session, *, user_id: int) -> FrozenSet[int]:
+        permissions = permission_index.get_permissions(user_id)
+        if permissions is None:
+            version = permission_index.version
+            rows = db.execute(self._groups_permissions_statement(user_id)).all()
+            permissions = permission_index.set_permissions(user_id, rows, version)
+        return permissions
+
+    def _groups_permissions_statement(self, user_id: int) -> Select:
+        return (
+            select(user_group.c.group_id, group_permission.c.permission_id)
+                .outerjoin(group_permission, group_permission.c.group_id == user_group.c.group_id)
+                .filter(user_group.c.user_id == user_id)
+        )
+
+    def _permissions_statement(self, user_id: int) -> Select:
+        return (
+            select(Permission.name).distinct()
+                .join(group_permission, group_permission.c.permission_id == Permission.id)
+                .join(user_group, user_group.c.group_id == group_permission.c.group_id)
+                .filter(user_group.c.user_id == user_id)
+        )
+
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
@@ -74,16 +195,45 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def is_superuser(self, user: User) -> bool:
         return user.is_superuser
 
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        ids = list(ids)
+        super()._invalidate(ids)
+        for id in ids:
+            principal_cache.pop(id)
+        permission_index.invalidate_users(ids)
+
 
 user = CRUDUser(User)
 
 class CRUDPermission(CRUDBase[Permission, PermissionCreate, PermissionUpdate]):
-    pass
+    filterable = ("name",)
+    sortable = ("id", "name")
+
+    def get_id_by_name(self, db: Session, *, name: str) -> Optional[int]:
+        id = permission_index.get_permission_id(name, default=False)
+        if id is False:
+            version = permission_index.version
+            id = db.execute(select(Permission.id).filter(Permission.name == name)).scalars().first()
+            permission_index.set_permission_id(name, id, version)
+        return id
+
+    def get_multi_by_name(self, db: Session, *, names: List[str]) -> List[Permission]:
+        return db.query(Permission).filter(Permission.name.in_(names)).all()
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        ids = list(ids)
+        super()._invalidate(ids)
+        permission_index.invalidate_permissions(ids)
 
 permission = CRUDPermission(Permission)
 
 
 class CRUDGroup(CRUDBase[Group, GroupCreate, GroupUpdate]):
+    includes = ("permissions",)
+    filterable = ("name", "permissions")
+    sortable = ("id", "name")
+    relation_filters = {"permissions": (group_permission.c.group_id, group_permission.c.permission_id)}
+
     def create(self, db: Session, *, obj_in: GroupCreate) -> Group:
             db_obj = Group(
                 name=obj_in.name,
@@ -92,27 +242,252 @@ class CRUDGroup(CRUDBase[Group, GroupCreate, GroupUpdate]):
             db_obj.permissions = permissions
             db.add(db_obj)
             db.commit()
-            db.refresh(db_obj)
+            self._invalidate([db_obj.id])
             return db_obj
 
+    def create_multi(self, db: Session, *, objs_in: List[GroupCreate]) -> List[Group]:
+        permission_ids = set().union(*(obj_in.permissions for obj_in in objs_in))
+        permissions = {
+            permission.id: permission
+            for permission in db.query(Permission).filter(Permission.id.in_(permission_ids))
+        } if permission_ids else {}
+        db_objs = [
+            Group(
+                name=obj_in.name,
+                permissions=[permissions[id] for id in obj_in.permissions if id in permissions],
+            )
+            for obj_in in objs_in
+        ]
+        return self._save_multi(db, db_objs)
+
     def update(
         self, db: Session, *, db_obj: Group, obj_in: GroupUpdate
     ) -> Group:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db_obj.permissions.clear()
-        permissions = db.query(Permission).filter(Permission.id.in_(obj_in.permissions)).all()
-        db_obj.permissions = permissions
+        self._update_row(db, db_obj=db_obj, update_data=update_data)
+        if 'permissions' in update_data:
+            self._replace_associations(db, db_obj=db_obj, name="permissions", ids=update_data['permissions'])
+        db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        ids = list(ids)
+        super()._invalidate(ids)
+        # Os grupos fazem parte do usuário em cache: só os usuários desses grupos são removidos
+        group_ids = frozenset(ids)
+        principal_cache.pop_where(lambda user_id, principal: bool(principal.groups & group_ids))
+        permission_index.invalidate_groups(ids)
+
+
+group = CRUDGroup(Group)
+
+
+class CRUDRevokedToken(CRUDBase[RevokedToken, RevokedTokenCreate, RevokedTokenCreate]):
+    def revoke(self, db: Session, *, token_data: TokenPayload) -> None:
+        if not token_data.jti or revoked_tokens.is_revoked(token_data.jti):
+            return
+        db_obj = RevokedToken(jti=token_data.jti, expires_at=datetime.utcfromtimestamp(token_data.exp))
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        revoked_tokens.add(token_data.jti, token_data.exp)
+
+    def sync(self, db: Session) -> None:
+        """
+        Load the tokens revoked since the last sync (by any process) and purge the expired ones.
+
+        Rows are read by created_at from db_revoked_tokens_sync_margin seconds before the last
+        sync: ids and creation times are not in commit order, so a revocation committed late by
+        another process is still read. Local revocations do not move the watermark.
+        """
+        now = datetime.utcnow()
+        synced_at = db.execute(select(func.now())).scalar()
+        revoked_tokens.prune()
+        statement = select(RevokedToken.jti, RevokedToken.expires_at).filter(RevokedToken.expires_at > now)
+        if revoked_tokens.synced_at is not None:
+            margin = timedelta(seconds=settings.revoked_tokens_sync_margin)
+            statement = statement.filter(RevokedToken.created_at >= revoked_tokens.synced_at - margin)
+        rows = db.execute(statement).all()
+        revoked_tokens.load(
+            ((jti, expires_at.replace(tzinfo=timezone.utc).timestamp()) for jti, expires_at in rows), synced_at
+        )
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.commit()
+
+
+revoked_token = CRUDRevokedToken(RevokedToken)
+
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    includes = CRUDUser.includes
+    filterable = CRUDUser.filterable
+    sortable = CRUDUser.sortable
+    relation_filters = CRUDUser.relation_filters
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        db_obj = User(
+            email=obj_in.email,
+            password=await get_password_hash_async(obj_in.password),
+            username=obj_in.username,
+            first_name=obj_in.first_name,
+            last_name=obj_in.last_name,
+            is_superuser=obj_in.is_superuser,
+            is_active=obj_in.is_active,
+        )
+        if hasattr(obj_in, 'groups'):
+            result = await db.execute(select(Group).filter(Group.id.in_(obj_in.groups)))
+            db_obj.groups = result.scalars().all()
+        db.add(db_obj)
+        await db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if 'password' in update_data:
+            update_data["password"] = await get_password_hash_async(update_data["password"])
+        await self._update_row(db, db_obj=db_obj, update_data=update_data)
+        if 'groups' in update_data:
+            await self._replace_associations(db, db_obj=db_obj, name="groups", ids=update_data['groups'] or ())
+        await db.commit()
+        self._invalidate([db_obj.id])
         return db_obj
 
+    async def get_multi_by_email(self, db: AsyncSession, *, emails: List[str]) -> List[User]:
+        result = await db.execute(select(User).filter(User.email.in_(emails)))
+        return result.scalars().all()
+
+    async def create_multi(self, db: AsyncSession, *, objs_in: List[UserCreate]) -> List[User]:
+        hashed_passwords = await get_password_hashes_async([obj_in.password for obj_in in objs_in])
+        return await db.run_sync(
+            lambda session: user.create_multi(session, objs_in=objs_in, hashed_passwords=hashed_passwords)
+        )
+
+    async def update_multi(
+        self, db: AsyncSession, *, objs_in: List[Union[UserBulkUpdate, Dict[str, Any]]]
+    ) -> List[User]:
+        passwords = [obj_in.get('password') if isinstance(obj_in, dict) else obj_in.password for obj_in in objs_in]
+        hashed_passwords = await get_password_hashes_async([password for password in passwords if password])
+        return await db.run_sync(
+            lambda session: user.update_multi(session, objs_in=objs_in, hashed_passwords=hashed_passwords)
+        )
+
+    async def get_permission_names(self, db: AsyncSession, *, user_id: int) -> List[str]:
+        result = await db.execute(user._permissions_statement(user_id))
+        return result.scalars().all()
+
+    async def has_permission(self, db: AsyncSession, *, user_id: int, name: str) -> bool:
+        statement = user._permissions_statement(user_id).filter(Permission.name == name).limit(1)
+        result = await db.execute(statement)
+        return result.first() is not None
+
+    async def get_permission_ids(self, db: AsyncSession, *, user_id: int) -> FrozenSet[int]:
+        permissions = permission_index.get_permissions(user_id)
+        if permissions is None:
+            version = permission_index.version
+            result = await db.execute(user._groups_permissions_statement(user_id))
+            permissions = permission_index.set_permissions(user_id, result.all(), version)
+        return permissions
+
+    async def authenticate(self, db: AsyncSession, *, email: str, password: str) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        if not await verify_password_async(password, user.password):
+            return None
+        return user
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        user._invalidate(ids)
+
+
+user_async = AsyncCRUDUser(User)
+
+class AsyncCRUDPermission(AsyncCRUDBase[Permission, PermissionCreate, PermissionUpdate]):
+    filterable = CRUDPermission.filterable
+    sortable = CRUDPermission.sortable
+
+    async def get_id_by_name(self, db: AsyncSession, *, name: str) -> Optional[int]:
+        id = permission_index.get_permission_id(name, default=False)
+        if id is False:
+            version = permission_index.version
+            result = await db.execute(select(Permission.id).filter(Permission.name == name))
+            id = permission_index.set_permission_id(name, result.scalars().first(), version)
+        return id
+
+    async def get_multi_by_name(self, db: AsyncSession, *, names: List[str]) -> List[Permission]:
+        result = await db.execute(select(Permission).filter(Permission.name.in_(names)))
+        return result.scalars().all()
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        permission._invalidate(ids)
+
+permission_async = AsyncCRUDPermission(Permission)
+
+
+class AsyncCRUDGroup(AsyncCRUDBase[Group, GroupCreate, GroupUpdate]):
+    includes = CRUDGroup.includes
+    filterable = CRUDGroup.filterable
+    sortable = CRUDGroup.sortable
+    relation_filters = CRUDGroup.relation_filters
+
+    async def create(self, db: AsyncSession, *, obj_in: GroupCreate) -> Group:
+        db_obj = Group(
+            name=obj_in.name,
+        )
+        result = await db.execute(select(Permission).filter(Permission.id.in_(obj_in.permissions)))
+        db_obj.permissions = result.scalars().all()
+        db.add(db_obj)
+        await db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    async def create_multi(self, db: AsyncSession, *, objs_in: List[GroupCreate]) -> List[Group]:
+        return await db.run_sync(lambda session: group.create_multi(session, objs_in=objs_in))
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: Group, obj_in: GroupUpdate
+    ) -> Group:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        await self._update_row(db, db_obj=db_obj, update_data=update_data)
+        if 'permissions' in update_data:
+            await self._replace_associations(db, db_obj=db_obj, name="permissions", ids=update_data['permissions'])
+        await db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        group._invalidate(ids)
+
+
+group_async = AsyncCRUDGroup(Group)
+
+
+class AsyncCRUDRevokedToken(AsyncCRUDBase[RevokedToken, RevokedTokenCreate, RevokedTokenCreate]):
+    async def revoke(self, db: AsyncSession, *, token_data: TokenPayload) -> None:
+        await db.run_sync(lambda session: revoked_token.revoke(session, token_data=token_data))
+
 
-group = CRUDGroup(Group)
\ No newline at end of file
+revoked_token_async = AsyncCRUDRevokedToken(RevokedToken)
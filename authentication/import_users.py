@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import SessionLocal
+from core.security import get_password_hashes
+
+from authentication import cruds, schemas
+
+'''
+Importação de usuários em lote a partir de um arquivo csv ou ndjson
+
+- As linhas são lidas em streaming e validadas com schemas.UserCreate
+- As senhas de cada lote são geradas em paralelo no pool de hash (bcrypt libera o GIL)
+- Cada lote é gravado de uma vez: COPY no PostgreSQL, executemany nos outros bancos
+- Linhas inválidas ou duplicadas são reportadas (ndjson) sem interromper a importação
+- Após cada lote gravado o checkpoint é salvo; rodar de novo continua de onde parou
+
+Uso: python -m authentication.import_users users.csv [--errors errors.ndjson] [--batch-size 5000]
+
+No csv, a coluna groups tem os ids dos grupos separados por ";".
+'''
+
+DUPLICATED = "The user with this username already exists in the system."
+
+
+def read_rows(file: TextIO, format: str) -> Iterator[Optional[Dict[str, Any]]]:
+    if format == "csv":
+        for row in csv.DictReader(file):
+            data = {key: value for key, value in row.items() if value not in ("", None)}
+            if "groups" in data:
+                data["groups"] = [id for id in data["groups"].split(";") if id]
+            yield data
+    else:
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def load_checkpoint(path: str) -> Dict[str, int]:
+    if not os.path.exists(path):
+        return {"row": 0, "imported": 0, "failed": 0}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, int]) -> None:
+    # Grava num arquivo temporário e renomeia, o checkpoint nunca fica pela metade
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(f"{path}.tmp", path)
+
+
+class UserImporter:
+    def __init__(self, db: Session, errors: TextIO, batch_size: int = 5000):
+        """
+        Validate, hash and insert users batch by batch, reporting the rows that fail.
+
+        **Parameters**
+
+        * `db`: Session used to write the batches
+        * `errors`: File where each failed row is written as a json line (row, errors)
+        * `batch_size`: Number of rows hashed and inserted at a time
+        """
+        self.db = db
+        self.errors = errors
+        self.batch_size = batch_size
+
+    def run(self, rows: Iterator[Dict[str, Any]], checkpoint_path: str) -> Dict[str, int]:
+        checkpoint = load_checkpoint(checkpoint_path)
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        for number, data in enumerate(rows, start=1):
+            if number <= checkpoint["row"]:
+                continue
+            batch.append((number, data))
+            if len(batch) >= self.batch_size:
+                self._run_batch(batch, checkpoint, checkpoint_path)
+                batch = []
+        if batch:
+            self._run_batch(batch, checkpoint, checkpoint_path)
+        return checkpoint
+
+    def _run_batch(
+        self, batch: List[Tuple[int, Dict[str, Any]]], checkpoint: Dict[str, int], checkpoint_path: str
+    ) -> None:
+        numbers, objs_in = self._validate(batch)
+        hashed_passwords = get_password_hashes([obj_in.password for obj_in in objs_in])
+        imported = self._insert(numbers, objs_in, hashed_passwords)
+        checkpoint["row"] = batch[-1][0]
+        checkpoint["imported"] += imported
+        checkpoint["failed"] += len(batch) - imported
+        self.errors.flush()
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    def _validate(self, batch: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List[int], List[schemas.UserCreate]]:
+        valid: Dict[str, Tuple[int, schemas.UserCreate]] = {}
+        for number, data in batch:
+            if not isinstance(data, dict):
+                self._error(number, "Invalid row.")
+                continue
+            try:
+                obj_in = schemas.UserCreate(**data)
+            except ValidationError as error:
+                self._error(number, error.errors())
+                continue
+            if not obj_in.email:
+                self._error(number, "The user email is required.")
+            elif obj_in.email in valid:
+                self._error(number, DUPLICATED)
+            else:
+                valid[obj_in.email] = (number, obj_in)
+        for user in cruds.user.get_multi_by_email(self.db, emails=list(valid)):
+            self._error(valid.pop(user.email)[0], DUPLICATED)
+        return [number for number, _ in valid.values()], [obj_in for _, obj_in in valid.values()]
+
+    def _insert(self, numbers: List[int], objs_in: List[schemas.UserCreate], hashed_passwords: List[str]) -> int:
+        if not objs_in:
+            return 0
+        try:
+            cruds.user.import_multi(self.db, objs_in=objs_in, hashed_passwords=hashed_passwords)
+            return len(objs_in)
+        except IntegrityError:
+            # Algum conflito no lote (ex: usuário criado ao mesmo tempo): grava linha a linha
+            self.db.rollback()
+        imported = 0
+        for number, obj_in, password in zip(numbers, objs_in, hashed_passwords):
+            try:
+                cruds.user.import_multi(self.db, objs_in=[obj_in], hashed_passwords=[password])
+                imported += 1
+            except IntegrityError as error:
+                self.db.rollback()
+                self._error(number, str(error.orig))
+        return imported
+
+    def _error(self, number: int, errors: Any) -> None:
+        self.errors.write(json.dumps({"row": number, "errors": errors}, default=str) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import users from a csv or ndjson file.")
+    parser.add_argument("path", help="csv or ndjson file, - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    parser.add_argument("--checkpoint", help="defaults to <path>.checkpoint")
+    parser.add_argument("--errors", help="file where failed rows are appended, defaults to stderr")
+    args = parser.parse_args(argv)
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    checkpoint_path = args.checkpoint or f"{'stdin' if args.path == '-' else args.path}.checkpoint"
+    file = sys.stdin if args.path == "-" else open(args.path, newline="")
+    errors = open(args.errors, "a") if args.errors else sys.stderr
+    db = SessionLocal()
+    try:
+        importer = UserImporter(db, errors, batch_size=args.batch_size)
+        checkpoint = importer.run(read_rows(file, format), checkpoint_path)
+    finally:
+        db.close()
+        file.close()
+        if errors is not sys.stderr:
+            errors.close()
+    print(f"{checkpoint['imported']} users imported, {checkpoint['failed']} failed, last row {checkpoint['row']}")
+
+
+if __name__ == "__main__":
+    main()
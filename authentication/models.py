@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Table, ForeignKey, func
 from sqlalchemy.orm import relationship
 
 from core.database import Base
@@ -7,48 +7,66 @@ from core.database import Base
 Arquivo com os  models da app de autenticação
 
 - É configurado o nome da tabela, colunas e relacionamentos
+- As colunas usadas nos filtros e ordenação das listagens (filterable / sortable dos cruds) têm índice
+- As tabelas de associação têm índice na segunda coluna da chave primária (busca pelos dois lados)
+- As linhas das tabelas de associação são apagadas pelo banco (ON DELETE CASCADE) junto com o usuário, grupo ou permissão
+- A coluna version é incrementada a cada atualização e usada para gerar o ETag das respostas
 '''
 
 class Permission(Base):
     __tablename__ = "permissions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 
 group_permission = Table('group_permission', Base.metadata,
-    Column('group_id', ForeignKey('groups.id'), primary_key=True),
-    Column('permission_id', ForeignKey('permissions.id'), primary_key=True)
+    Column('group_id', ForeignKey('groups.id', ondelete="CASCADE"), primary_key=True),
+    Column('permission_id', ForeignKey('permissions.id', ondelete="CASCADE"), primary_key=True, index=True)
 )
 
 class Group(Base):
     __tablename__ = "groups"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     permissions = relationship(
         "Permission",
         secondary=group_permission,
+        passive_deletes=True,
     )
 
 
 user_group = Table('user_group', Base.metadata,
-    Column('group_id', ForeignKey('groups.id'), primary_key=True),
-    Column('user_id', ForeignKey('users.id'), primary_key=True)
+    Column('group_id', ForeignKey('groups.id', ondelete="CASCADE"), primary_key=True),
+    Column('user_id', ForeignKey('users.id', ondelete="CASCADE"), primary_key=True, index=True)
 )
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     first_name = Column(String)
     last_name = Column(String)
-    username = Column(String, nullable=False)
+    username = Column(String, nullable=False, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
-    is_active = Column(Boolean(), default=True)
+    is_active = Column(Boolean(), default=True, index=True)
     is_superuser = Column(Boolean(), default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     groups = relationship(
         "Group",
         secondary=user_group,
+        passive_deletes=True,
     )
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), index=True, nullable=False, server_default=func.now())
@@ -1,6 +1,9 @@
-from typing import Optional, Set
+from datetime import datetime
+from typing import FrozenSet, List, Optional, Set
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, conlist
+
+from core.config import settings
 
 '''
 Arquivo com os schemas da app
@@ -50,11 +53,48 @@ class UserInDB(UserInDBBase):
 
 class UserToken(User):
     access_token: str
+    refresh_token: str
+    token_type: str
+
+
+class Token(BaseModel):
+    access_token: str
+    refresh_token: str
     token_type: str
 
 
+class RefreshToken(BaseModel):
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+    type: str = "access"
+    perms: Optional[List[str]] = None
+
+
+# Authenticated user kept in cache between requests
+class Principal(BaseModel):
+    id: int
+    is_active: Optional[bool] = True
+    is_superuser: Optional[bool] = False
+    groups: FrozenSet[int] = frozenset()
+
+    class Config:
+        allow_mutation = False
+
+
+class RevokedTokenCreate(BaseModel):
+    jti: str
+    expires_at: datetime
+
+
+# Properties to receive via API on bulk update
+class UserBulkUpdate(UserBase):
+    id: int
+    password: Optional[str] = None
 
 
 
@@ -85,6 +125,10 @@ class PermissionInDB(PermissionInDBBase):
     pass
 
 
+class PermissionBulkUpdate(PermissionBase):
+    id: int
+
+
 # Groups
 class GroupBase(BaseModel):
   name: str
@@ -111,3 +155,45 @@ class Group(GroupInDBBase):
 class GroupInDB(GroupInDBBase):
     pass
 
+
+# Properties to return via API with include= (relationships loaded on request)
+class GroupWithPermissions(Group):
+    permissions: Optional[List[Permission]] = None
+
+
+class UserWithGroups(User):
+    groups: Optional[List[GroupWithPermissions]] = None
+
+
+class GroupBulkUpdate(GroupBase):
+    id: int
+
+
+# Bulk
+UserCreateBulk = conlist(UserCreate, min_items=1, max_items=settings.bulk_max_items)
+UserUpdateBulk = conlist(UserBulkUpdate, min_items=1, max_items=settings.bulk_max_items)
+PermissionCreateBulk = conlist(PermissionCreate, min_items=1, max_items=settings.bulk_max_items)
+PermissionUpdateBulk = conlist(PermissionBulkUpdate, min_items=1, max_items=settings.bulk_max_items)
+GroupCreateBulk = conlist(GroupCreate, min_items=1, max_items=settings.bulk_max_items)
+GroupUpdateBulk = conlist(GroupBulkUpdate, min_items=1, max_items=settings.bulk_max_items)
+IdsBulk = conlist(int, min_items=1, max_items=settings.bulk_max_items)
+
+
+# Result of each item of a bulk request
+class BulkResult(BaseModel):
+    index: int
+    status: int
+    detail: Optional[str] = None
+
+
+class UserBulkResult(BulkResult):
+    data: Optional[User] = None
+
+
+class PermissionBulkResult(BulkResult):
+    data: Optional[Permission] = None
+
+
+class GroupBulkResult(BulkResult):
+    data: Optional[Group] = None
+
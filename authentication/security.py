@@ -1,41 +1,82 @@
-from typing import Generator
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Generator, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 
 from core.config import settings
-from core.database import get_db
+from core.database import SessionLocal, get_async_db, get_db
 from core import security
 
 from authentication import cruds, schemas, models
+from authentication.cache import principal_cache, revoked_tokens, token_cache
 
 '''
 Arquivo com os middlewares de segurança da app
 
 - Neste aquivo e possível obeter o usuário logado de acordo com o token jwt
+- As dependências com sufixo _async são usadas pelos endpoints async
+- get_current_principal mantém em cache o usuário autenticado, sem consultar o banco a cada requisição
+- O token já validado fica em cache até expirar, evitando decodificar o jwt a cada requisição
+- Tokens revogados (logout e refresh) são recusados consultando a lista de revogados em memória
+- has_permission usa as permissões do token (claim perms) ou o índice de permissões em memória
 '''
 
+logger = logging.getLogger(__name__)
+
 reusable_oauth2 = OAuth2PasswordBearer(
   tokenUrl=f"{settings.api_str}/authentication/login"
 )
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def decode_token(token: str) -> schemas.TokenPayload:
+    key = hashlib.sha256(token.encode()).digest()
+    if settings.token_cache_enabled:
+        token_data = token_cache.get(key)
+        if token_data is not None:
+            return token_data
     try:
-        payload = jwt.decode(
-            token, settings.app_secret, algorithms=[security.ALGORITHM]
-        )
+        payload = security.decode_jwt(token)
         token_data = schemas.TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
-            status_code=status.HTTP_401_FORBIDDEN,
+            status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
+    if settings.token_cache_enabled and token_data.exp:
+        token_cache.set(key, token_data, ttl=token_data.exp - time.time())
+    return token_data
+
+
+def validate_token(token_data: schemas.TokenPayload, token_type: str) -> schemas.TokenPayload:
+    if token_data.type != token_type or (token_data.jti and revoked_tokens.is_revoked(token_data.jti)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    return token_data
+
+
+def get_token_data(token: str = Depends(reusable_oauth2)) -> schemas.TokenPayload:
+    return validate_token(decode_token(token), "access")
+
+
+def get_refresh_token_data(token: str) -> schemas.TokenPayload:
+    return validate_token(decode_token(token), "refresh")
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token_data: schemas.TokenPayload = Depends(get_token_data)
+) -> models.User:
     user = cruds.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -50,6 +91,44 @@ def get_current_active_user(
     return current_user
 
 
+def get_principal(user: models.User) -> schemas.Principal:
+    principal = schemas.Principal(
+        id=user.id,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+        groups=frozenset(group.id for group in user.groups),
+    )
+    if settings.principal_cache_enabled:
+        principal_cache.set(user.id, principal)
+    return principal
+
+
+def get_cached_principal(token_data: schemas.TokenPayload) -> Optional[schemas.Principal]:
+    if not settings.principal_cache_enabled:
+        return None
+    return principal_cache.get(token_data.sub)
+
+
+def get_current_principal(
+    db: Session = Depends(get_db), token_data: schemas.TokenPayload = Depends(get_token_data)
+) -> schemas.Principal:
+    principal = get_cached_principal(token_data)
+    if principal is None:
+        user = cruds.user.get(db, id=token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = get_principal(user)
+    return principal
+
+
+def get_current_active_principal(
+    principal: schemas.Principal = Depends(get_current_principal),
+) -> schemas.Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+
 def get_current_active_superuser(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -61,16 +140,104 @@ def get_current_active_superuser(
 
 
 
-def has_permission(permission_name: str) -> bool:
-    def has_permission_(db: Session = Depends(get_db)):
-        permission = (
-            db.query(models.Permission.id).join(models.Group, models.User.groups)
-                .join(models.Permission, models.Group.permissions)
-                .filter(models.Permission.name == permission_name)
-                .first()
+def has_permission(permission_name: str, fresh: bool = False) -> bool:
+    """
+    Dependency that requires `permission_name`. With `fresh=True` the permissions in the
+    token are ignored, so a revoked permission is denied right away.
+    """
+    def has_permission_(
+        db: Session = Depends(get_db),
+        token_data: schemas.TokenPayload = Depends(get_token_data),
+        principal: schemas.Principal = Depends(get_current_active_principal),
+    ):
+        if token_data.perms is not None and not fresh:
+            allowed = permission_name in token_data.perms
+        elif settings.permission_index_enabled:
+            permission_id = cruds.permission.get_id_by_name(db, name=permission_name)
+            allowed = permission_id in cruds.user.get_permission_ids(db, user_id=principal.id)
+        else:
+            allowed = cruds.user.has_permission(db, user_id=principal.id, name=permission_name)
+        if not allowed:
+            raise HTTPException(status_code=403, detail="You don't have permission")
+        return True
+    return has_permission_
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token_data: schemas.TokenPayload = Depends(get_token_data)
+) -> models.User:
+    user = await cruds.user_async.get(db, id=token_data.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async),
+) -> models.User:
+    if not cruds.user_async.is_active(current_user):
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return current_user
+
+
+async def get_current_principal_async(
+    db: AsyncSession = Depends(get_async_db), token_data: schemas.TokenPayload = Depends(get_token_data)
+) -> schemas.Principal:
+    principal = get_cached_principal(token_data)
+    if principal is None:
+        result = await db.execute(
+            select(models.User).options(selectinload(models.User.groups))
+                .filter(models.User.id == token_data.sub)
         )
-        if not permission:
+        user = result.scalars().first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = get_principal(user)
+    return principal
+
+
+async def get_current_active_principal_async(
+    principal: schemas.Principal = Depends(get_current_principal_async),
+) -> schemas.Principal:
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Inactive user")
+    return principal
+
+
+def has_permission_async(permission_name: str, fresh: bool = False) -> bool:
+    async def has_permission_(
+        db: AsyncSession = Depends(get_async_db),
+        token_data: schemas.TokenPayload = Depends(get_token_data),
+        principal: schemas.Principal = Depends(get_current_active_principal_async),
+    ):
+        if token_data.perms is not None and not fresh:
+            allowed = permission_name in token_data.perms
+        elif settings.permission_index_enabled:
+            permission_id = await cruds.permission_async.get_id_by_name(db, name=permission_name)
+            allowed = permission_id in await cruds.user_async.get_permission_ids(db, user_id=principal.id)
+        else:
+            allowed = await cruds.user_async.has_permission(db, user_id=principal.id, name=permission_name)
+        if not allowed:
             raise HTTPException(status_code=403, detail="You don't have permission")
         return True
     return has_permission_
 
+
+def sync_revoked_tokens() -> None:
+    db = SessionLocal()
+    try:
+        cruds.revoked_token.sync(db)
+    finally:
+        db.close()
+
+
+async def sync_revoked_tokens_periodically() -> None:
+    """
+    Keep the revoked tokens of this process in sync with the ones revoked by other processes.
+    """
+    while True:
+        await asyncio.sleep(settings.revoked_tokens_sync_interval)
+        try:
+            await run_in_threadpool(sync_revoked_tokens)
+        except Exception:
+            logger.exception("Could not sync the revoked tokens")
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from authentication import cruds, schemas
+from core.config import settings
+from core.database import SessionLocal
+
+'''
+Benchmark de requisições por segundo: endpoints sync (threadpool) x async (ASYNC_ROUTERS=true)
+
+- Sobe o servidor (uvicorn, um worker) duas vezes, com ASYNC_ROUTERS=false e true, usando o banco do .env
+- Cria o usuário do benchmark se não existir, faz login e dispara GET /users/{id} com N requisições simultâneas
+- Com concorrência alta o caminho sync fica limitado pelas threads do threadpool; o async só pelo pool do banco
+- O cliente roda na mesma máquina que o servidor: compare as duas colunas, não os números absolutos
+
+Uso: python -m benchmarks.async_throughput [--concurrency 10 100 500] [--requests 5000]
+'''
+
+EMAIL = "benchmark@example.com"
+PASSWORD = "benchmark-password"
+LOGIN_PATH = f"{settings.api_str}/authentication/login"
+USER_PATH = f"{settings.api_str}/authentication/users/{{id}}"
+
+
+def benchmark_user() -> int:
+    db = SessionLocal()
+    try:
+        user = cruds.user.get_by_email(db, email=EMAIL)
+        if user is None:
+            user = cruds.user.create(db, obj_in=schemas.UserCreate(email=EMAIL, username="benchmark", password=PASSWORD))
+        return user.id
+    finally:
+        db.close()
+
+
+def start_server(port: int, async_routers: bool) -> subprocess.Popen:
+    env = {**os.environ, "ASYNC_ROUTERS": "true" if async_routers else "false"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get(f"{settings.api_str}/openapi.json")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+async def login(base_url: str) -> Dict[str, str]:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        response = await client.post(LOGIN_PATH, data={"username": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def requests_per_second(
+    base_url: str, path: str, headers: Dict[str, str], concurrency: int, total: int
+) -> Tuple[float, int]:
+    """
+    (requests/sec, failed requests) of `total` GETs to `path` with `concurrency` requests in flight.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    failed = 0
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        remaining = iter(range(total))
+
+        async def worker() -> None:
+            nonlocal failed
+            for _ in remaining:
+                try:
+                    response = await client.get(path)
+                    failed += response.status_code != 200
+                except httpx.TransportError:
+                    failed += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started), failed
+
+
+async def measure(port: int, async_routers: bool, user_id: int, levels: List[int], total: int) -> List[Tuple[float, int]]:
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, async_routers)
+    try:
+        await wait_ready(base_url)
+        headers = await login(base_url)
+        path = USER_PATH.format(id=user_id)
+        await requests_per_second(base_url, path, headers, 10, 200)
+        return [await requests_per_second(base_url, path, headers, level, total) for level in levels]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare requests/sec of the sync and async routers.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    user_id = benchmark_user()
+    sync = asyncio.run(measure(args.port, False, user_id, args.concurrency, args.requests))
+    async_ = asyncio.run(measure(args.port, True, user_id, args.concurrency, args.requests))
+    for level, (old, old_failed), (new, new_failed) in zip(args.concurrency, sync, async_):
+        print(
+            f"{level:>5} concurrent: sync {old:8.1f} req/s  async {new:8.1f} req/s  "
+            f"speedup {new / old:5.2f}x  failed {old_failed}/{new_failed}"
+        )
+
+
+if __name__ == "__main__":
+    main()
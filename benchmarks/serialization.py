@@ -0,0 +1,65 @@
+import timeit
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from starlette.responses import Response
+
+from authentication import models, schemas
+from core.responses import fast_response
+
+'''
+Benchmark da serialização das listagens: caminho padrão do FastAPI x modo rápido (FAST_RESPONSES)
+
+- Padrão: response_model (orm_mode + validação) -> jsonable_encoder -> json
+- Rápido: campos do schema lidos direto dos objetos -> orjson
+
+Uso: python -m benchmarks.serialization
+'''
+
+
+def make_users(count: int) -> List[models.User]:
+    return [
+        models.User(
+            id=id,
+            email=f"user{id}@example.com",
+            username=f"user{id}",
+            first_name="First",
+            last_name="Last",
+            is_active=True,
+            is_superuser=False,
+            version=1,
+        )
+        for id in range(1, count + 1)
+    ]
+
+
+def default_path(field, users) -> bytes:
+    # O mesmo que fastapi.routing.serialize_response faz com o response_model
+    value, errors = field.validate(users, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def fast_path(users) -> bytes:
+    return fast_response(Response(), users, schemas.User).body
+
+
+def main() -> None:
+    field = create_response_field(name="Response_read_users", type_=List[schemas.User])
+    for count in (25, 100, 1000):
+        users = make_users(count)
+        assert orjson.loads(default_path(field, users)) == orjson.loads(fast_path(users))
+        number = max(10, 10000 // count)
+        default = min(timeit.repeat(lambda: default_path(field, users), number=number, repeat=5)) / number
+        fast = min(timeit.repeat(lambda: fast_path(users), number=number, repeat=5)) / number
+        print(
+            f"{count:>5} rows: default {default * 1000:8.3f} ms  "
+            f"fast {fast * 1000:8.3f} ms  speedup {default / fast:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
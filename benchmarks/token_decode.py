@@ -0,0 +1,60 @@
+import argparse
+import itertools
+import time
+from typing import List
+
+from authentication.cache import token_cache
+from authentication.security import decode_token
+from core import security
+from core.config import settings
+
+'''
+Benchmark da decodificação dos tokens jwt: sem cache (jose + TokenPayload a cada requisição) x token_cache
+
+- Cada "requisição" decodifica um token de um conjunto de --tokens tokens distintos (usuários ativos)
+- Sem cache: verifica a assinatura (HMAC), faz o parse do json e valida o TokenPayload toda vez
+- Com cache: sha256 do token e busca no LRU, a decodificação só acontece no primeiro uso de cada token
+- Os tokens com permissões (TOKEN_PERMISSIONS) são maiores e mais caros de decodificar
+
+Uso: python -m benchmarks.token_decode [--tokens 1000] [--number 100000]
+'''
+
+
+def make_tokens(count: int, permissions: int) -> List[str]:
+    names = [f"app.permission_{index}" for index in range(permissions)] if permissions else None
+    return [security.create_access_token(id, permissions=names) for id in range(1, count + 1)]
+
+
+def decodes_per_second(tokens: List[str], number: int, cache: bool) -> float:
+    settings.token_cache_enabled = cache
+    token_cache.clear()
+    requests = itertools.cycle(tokens)
+    started = time.perf_counter()
+    for _ in range(number):
+        decode_token(next(requests))
+    return number / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JWT decode throughput with and without token_cache.")
+    parser.add_argument("--tokens", type=int, default=1000, help="distinct tokens in use")
+    parser.add_argument("--number", type=int, default=100000, help="decodes per measurement")
+    args = parser.parse_args()
+    enabled = settings.token_cache_enabled
+    try:
+        for permissions in (0, 50):
+            tokens = make_tokens(args.tokens, permissions)
+            without = decodes_per_second(tokens, args.number, cache=False)
+            with_cache = decodes_per_second(tokens, args.number, cache=True)
+            stats = token_cache.stats()
+            print(
+                f"{permissions:>3} permissions ({len(tokens[0])} bytes): "
+                f"no cache {without:10.0f}/s  cache {with_cache:10.0f}/s  speedup {with_cache / without:5.1f}x  "
+                f"hit rate {stats['hit_rate']:.1%}  memory {stats['bytes'] / 1024:.0f} KiB"
+            )
+    finally:
+        settings.token_cache_enabled = enabled
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,17 @@ from fastapi import APIRouter
 
 from .config import settings
 from authentication.api import router as router_users
+from authentication.api_async import router as router_users_async
 
 '''
 Arquivos com os endpoints principais do projeto
 
 - Deve ser importado nesse arquivo, os arquivo routers de todas as apps
+- Com ASYNC_ROUTERS=true são usados os routers async das apps
 '''
 
 api_router = APIRouter(prefix=settings.api_str)
-api_router.include_router(router_users, prefix="/authentication")
+api_router.include_router(
+    router_users_async if settings.async_routers else router_users,
+    prefix="/authentication"
+)
@@ -0,0 +1,20 @@
+from typing import Any, Dict, List
+
+'''
+Arquivo com funções auxiliares dos endpoints de lote (/bulk)
+
+- Cada item da requisição recebe um resultado com o seu índice, status e dados
+'''
+
+
+def bulk_results(ids: List[Any], objs: List[Any], detail: str) -> List[Dict[str, Any]]:
+    """
+    One result per requested id: 200 with the object when found, 404 with `detail` otherwise.
+    """
+    found = {obj.id: obj for obj in objs}
+    return [
+        {"index": index, "status": 200, "data": found[id]}
+        if id in found else
+        {"index": index, "status": 404, "detail": detail}
+        for index, id in enumerate(ids)
+    ]
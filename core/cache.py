@@ -0,0 +1,129 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+'''
+Arquivo com o cache em memória usado pelas apps
+
+- Cache LRU com tempo de expiração (TTL) por item, seguro para uso entre threads
+- Mantém contadores de acertos (hits) e falhas (misses) e, opcionalmente, a memória usada
+- Filtro de bloom: teste de pertinência compacto, sem falsos negativos
+'''
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(
+        self, maxsize: int, ttl: float, sizeof: Optional[Callable[[Hashable, Any], int]] = None
+    ):
+        """
+        LRU cache whose entries also expire `ttl` seconds after being set.
+
+        **Parameters**
+
+        * `maxsize`: Maximum number of entries, the least recently used is evicted first
+        * `ttl`: Default time to live of an entry, in seconds
+        * `sizeof`: Optional function returning the approximate bytes of an entry (key, value)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (expires_at, value)
+            if self.sizeof is not None:
+                self.nbytes += self.sizeof(key, value)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Remove the entries whose (key, value) match `predicate`.
+        """
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(key, value)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self.nbytes,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        item = self._data.pop(key, _MISSING)
+        if item is not _MISSING and self.sizeof is not None:
+            self.nbytes -= self.sizeof(key, item[1])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Compact set membership test: `key in bloom` may give false positives
+        (about `error_rate` when holding `capacity` keys) but never false negatives.
+
+        **Parameters**
+
+        * `capacity`: Expected number of keys
+        * `error_rate`: Expected rate of false positives at `capacity` keys
+        """
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
@@ -1,5 +1,6 @@
+import os
 import secrets
-from typing import List
+from typing import List, Optional
 
 from pydantic import AnyHttpUrl, BaseSettings
 
@@ -23,7 +24,84 @@ class Settings(BaseSettings):
     db_database: str
     db_username: str
     db_password: str
-    
+    # Driver asyncio (ex: postgresql+asyncpg); se vazio é derivado de db_connection
+    db_async_connection: Optional[str] = None
+    # Pool de conexões de cada engine (por processo): tamanho, conexões extras, espera máxima e reciclagem em segundos
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    # Perfil para PgBouncer em modo transaction: sem pool na app (NullPool) e sem prepared statements no asyncpg
+    db_pgbouncer: bool = False
+    # Intervalo em segundos da verificação das conexões em segundo plano (substitui o pool_pre_ping), 0 desativa;
+    # verifica uma conexão por engine, então db_pool_recycle deve ficar abaixo do timeout de conexões ociosas do servidor
+    db_pool_validate_interval: int = 30
+    # Réplicas de leitura (uris no mesmo formato do banco principal), usadas pelos endpoints de leitura
+    db_replica_urls: List[str] = []
+    # Escolha da réplica: round_robin ou least_connections
+    db_replica_selection: str = "round_robin"
+    # Réplica com atraso maior que db_replica_max_lag segundos (ou fora do ar) não recebe leituras
+    db_replica_max_lag: int = 10
+    db_replica_check_interval: int = 5
+    # Depois de uma escrita o cliente lê do primário por esse tempo em segundos
+    db_read_your_writes_seconds: int = 5
+    # Usa os endpoints async (AsyncSession) no lugar dos endpoints sync
+    async_routers: bool = False
+    # Quantidade máxima de itens por requisição nos endpoints de lote (/bulk)
+    bulk_max_items: int = 1000
+    # Serializa as listagens direto dos objetos do banco com orjson, sem validar de novo com o pydantic
+    fast_responses: bool = False
+    # Linhas lidas do banco por vez na exportação em streaming (/users/export)
+    export_batch_size: int = 1000
+    # Total das listagens no header X-Total-Count: exact, estimated (estatísticas do banco) ou none
+    count_mode: str = "none"
+    count_cache_ttl: int = 10
+    count_cache_size: int = 1000
+    # Conta as consultas SQL de cada requisição (header Server-Timing e log); N+1 a partir de n_plus_one_threshold repetições
+    sql_instrumentation: bool = False
+    n_plus_one_threshold: int = 5
+    # Métricas no formato do Prometheus na rota /metrics; os gauges dos pools são atualizados a cada metrics_sample_interval segundos
+    metrics_enabled: bool = False
+    metrics_sample_interval: int = 5
+    # Linhas validadas e gravadas por vez na importação de usuários (python -m authentication.import_users)
+    import_batch_size: int = 5000
+
+    # Cache do usuário autenticado (evita um SELECT por requisição)
+    principal_cache_enabled: bool = True
+    principal_cache_ttl: int = 60
+    principal_cache_size: int = 10000
+
+    # Duração dos tokens jwt, o refresh token gera novos tokens de acesso
+    access_token_expire_minutes: int = 15
+    refresh_token_expire_minutes: int = 60 * 24 * 8 # 8 days
+    # Capacidade do filtro de tokens revogados e intervalo de sincronização com o banco
+    revoked_tokens_capacity: int = 100000
+    revoked_tokens_sync_interval: int = 30
+    # Cada sincronização relê os tokens revogados desde esse tanto de segundos antes da anterior (transações lentas)
+    revoked_tokens_sync_margin: int = 60
+
+    # Cache dos tokens jwt já validados (evita decodificar o mesmo token a cada requisição)
+    token_cache_enabled: bool = True
+    token_cache_size: int = 10000
+
+    # Inclui as permissões do usuário no token jwt (has_permission sem consultar o banco)
+    token_permissions: bool = False
+    # Tamanho máximo do token em bytes, acima disso as permissões não são incluídas
+    token_max_size: int = 4096
+
+    # Índice em memória das permissões por usuário, usado pelo has_permission no lugar do join
+    permission_index_enabled: bool = True
+    permission_index_size: int = 100000
+    # Tempo em segundos das entradas do índice; a invalidação só vale no próprio processo,
+    # então é o atraso máximo para uma permissão removida em outro worker deixar de valer
+    permission_index_ttl: int = 30
+
+    # Hash de senha (bcrypt) em pool de threads próprio com fila limitada
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = os.cpu_count() or 1
+    password_hash_queue_size: int = 64
+    password_hash_retry_after: int = 1
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,25 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import io
+import json
+from collections import defaultdict
+from typing import (
+    Any, AsyncIterator, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import Column, Table, bindparam, delete, func, insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 
+from .cache import TTLCache
+from .config import settings
 from .database import Base
+from .fields import fields_options
+from .filters import OPERATORS, Filter, check_indexes
+from .includes import include_options
+from .pagination import keyset_clause
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -16,9 +31,26 @@ Arquivos com com crud padrão para um models
 
 - Herdando essa classe, já e possível ter o crud funcionando normalmente
 - O desenvolvedor pode customizar ou criar novos métodos herdando dessa classe
+- AsyncCRUDBase possui a mesma api do CRUDBase, porém usando AsyncSession
+- Os métodos *_multi criam, atualizam e removem em lote numa única transação
+- O total exato das listagens fica em cache por alguns segundos, limpo a cada escrita no model
+- create e update não releem a linha depois do commit: o UPDATE usa RETURNING quando o banco suporta
+- remove(returning=True) apaga com um único DELETE ... RETURNING, sem carregar o objeto antes
 '''
 
+# Cache do total (count) por model, compartilhado entre o crud sync e o async do mesmo model
+_count_caches: Dict[Any, TTLCache] = {}
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Relacionamentos que podem ser carregados com include= (ex: "groups", "groups.permissions")
+    includes: Tuple[str, ...] = ()
+    # Colunas usadas em filter= e sort=, precisam de índice a não ser que estejam em unindexed
+    filterable: Tuple[str, ...] = ()
+    sortable: Tuple[str, ...] = ("id",)
+    unindexed: Tuple[str, ...] = ()
+    # Filtros por relacionamento: nome -> (coluna com o id deste model, coluna filtrada) da tabela de associação
+    relation_filters: Dict[str, Tuple[Column, Column]] = {}
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -29,21 +61,177 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        check_indexes({**self.filter_columns(), **self.sort_columns()}, self.unindexed)
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def filter_columns(self) -> Dict[str, Column]:
+        """
+        Column compared by each filterable name (the association column for relation filters).
+        """
+        return {
+            name: self.relation_filters[name][1] if name in self.relation_filters else self.model.__table__.c[name]
+            for name in self.filterable
+        }
+
+    def sort_columns(self) -> Dict[str, Column]:
+        return {name: self.model.__table__.c[name] for name in self.sortable}
+
+    def get(
+        self, db: Session, id: Any, include: Sequence[str] = (), fields: Sequence[str] = ()
+    ) -> Optional[ModelType]:
+        return db.query(self.model).options(*self._load_options(include, fields)).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 25
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 25,
+        cursor: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = (),
+        fields: Sequence[str] = (),
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = ()
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        statement = self._get_multi_statement(skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort)
+        return db.execute(statement.options(*self._load_options(include, fields, sort))).scalars().all()
+
+    def count(self, db: Session, *, mode: str = "exact", filters: Sequence[Filter] = ()) -> Optional[int]:
+        """
+        Number of rows matching `filters`, for the X-Total-Count header.
+
+        * `exact`: COUNT(*), cached for `count_cache_ttl` seconds and cleared on every write
+        * `estimated`: the planner estimate (EXPLAIN) on PostgreSQL, exact on other databases
+        * `none`: not counted, returns None
+        """
+        if mode == "none":
+            return None
+        if mode == "estimated":
+            estimate = self._estimate_count(db, filters)
+            if estimate is not None:
+                return estimate
+        key = tuple(filters)
+        total = self._counts.get(key)
+        if total is None:
+            statement = select(func.count()).select_from(self.model).filter(*self._filter_clauses(filters))
+            total = db.execute(statement).scalar()
+            self._counts.set(key, total)
+        return total
+
+    @property
+    def _counts(self) -> TTLCache:
+        if self.model not in _count_caches:
+            _count_caches[self.model] = TTLCache(settings.count_cache_size, settings.count_cache_ttl)
+        return _count_caches[self.model]
+
+    def _estimate_count(self, db: Session, filters: Sequence[Filter]) -> Optional[int]:
+        # Estimativa do planejador (pg_class.reltuples e estatísticas das colunas), sem ler a tabela
+        connection = db.connection()
+        if connection.dialect.name != "postgresql":
+            return None
+        # render_postcompile expande os parâmetros do filtro "in" (um por valor) no próprio SQL do EXPLAIN
+        compiled = select(self.model.id).filter(*self._filter_clauses(filters)).compile(
+            dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+        )
+        params = (
+            compiled.params if compiled.positiontup is None
+            else tuple(compiled.params[name] for name in compiled.positiontup)
+        )
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_version(self, db: Session, id: Any) -> Optional[int]:
+        """
+        Version of a row without loading it, used to answer conditional GETs.
+        """
+        return db.execute(self._get_version_statement(id)).scalar()
+
+    def get_multi_versions(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 25,
+        cursor: Optional[Dict[str, Any]] = None,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = ()
+    ) -> List[Tuple[Any, int]]:
+        statement = self._get_multi_statement(skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort)
+        return [tuple(row) for row in db.execute(statement.with_only_columns(self.model.id, self.model.version))]
+
+    def stream(self, db: Session, *, columns: Sequence[str], batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        """
+        Every row with only `columns`, read through a server-side cursor in batches
+        of `batch_size` rows, so memory stays flat whatever the size of the table.
+        """
+        result = db.execute(self._stream_statement(columns))
+        for rows in result.partitions(batch_size):
+            yield [tuple(row) for row in rows]
+
+    def _stream_statement(self, columns: Sequence[str]) -> Select:
+        table = self.model.__table__
+        return (
+            select(*[table.c[name] for name in columns])
+            .order_by(table.c.id)
+            .execution_options(stream_results=True)
+        )
+
+    def _load_options(
+        self, include: Sequence[str], fields: Sequence[str], sort: Sequence[Tuple[str, bool]] = ()
+    ) -> List[Any]:
+        """
+        Loader options for the relationships in `include` and, when given, only the columns in `fields`
+        (plus the `sort` columns, needed for the next cursor).
+        """
+        if fields:
+            fields = [*fields, *(name for name, _ in sort)]
+        return include_options(self.model, include) + fields_options(self.model, fields)
+
+    def _get_version_statement(self, id: Any) -> Select:
+        return select(self.model.version).filter(self.model.id == id)
+
+    def _get_multi_statement(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 25,
+        cursor: Optional[Dict[str, Any]] = None,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = ()
+    ) -> Select:
+        """
+        Page matching `filters`, ordered by the `sort` keys and then `id`. With a `cursor`
+        (keyset pagination) the page starts after the cursor keys and `skip` is ignored,
+        so deep pages cost the same as the first.
+        """
+        keys = [(getattr(self.model, name), descending) for name, descending in sort]
+        if "id" not in {name for name, _ in sort}:
+            keys.append((self.model.id, False))
+        statement = (
+            select(self.model)
+            .filter(*self._filter_clauses(filters))
+            .order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+        )
+        if cursor is not None:
+            return statement.filter(keyset_clause(keys, cursor)).limit(limit)
+        return statement.offset(skip).limit(limit)
+
+    def _filter_clauses(self, filters: Sequence[Filter]) -> List[Any]:
+        return [self._filter_clause(filter) for filter in filters]
+
+    def _filter_clause(self, filter: Filter) -> Any:
+        if filter.name in self.relation_filters:
+            id_column, column = self.relation_filters[filter.name]
+            return self.model.id.in_(select(id_column).filter(OPERATORS[filter.op](column, filter.value)))
+        return OPERATORS[filter.op](getattr(self.model, filter.name), filter.value)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        self._invalidate([db_obj.id])
         return db_obj
 
     def update(
@@ -53,21 +241,332 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        self._update_row(db, db_obj=db_obj, update_data=update_data)
         db.commit()
-        db.refresh(db_obj)
+        self._invalidate([db_obj.id])
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
+    def remove(self, db: Session, *, id: int, returning: bool = False) -> Optional[ModelType]:
+        """
+        Delete the row `id`. With `returning` the row is deleted by a single DELETE ... RETURNING
+        (SELECT + DELETE where the dialect has no RETURNING) without loading the object, and None
+        is returned when there is no such row. The association rows are removed by ON DELETE CASCADE.
+        """
+        if returning:
+            return self._remove_returning(db, id=id)
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj
\ No newline at end of file
+        self._invalidate([id])
+        return obj
+
+    def create_multi(self, db: Session, *, objs_in: List[CreateSchemaType]) -> List[ModelType]:
+        db_objs = [self.model(**jsonable_encoder(obj_in)) for obj_in in objs_in]  # type: ignore
+        return self._save_multi(db, db_objs)
+
+    def update_multi(
+        self, db: Session, *, objs_in: List[Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        """
+        Update many rows by `id`, one executemany UPDATE per distinct set of columns.
+        Returns the rows that exist, in the order of `objs_in`.
+        """
+        columns = {column.key for column in self.model.__table__.columns}
+        statements: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+        ids = []
+        for obj_in in objs_in:
+            update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+            params = {
+                field: value for field, value in update_data.items()
+                if field in columns and field not in ("id", "version")
+            }
+            ids.append(update_data["id"])
+            if params:
+                statements[tuple(sorted(params))].append({**params, "_id": update_data["id"]})
+        table = self.model.__table__
+        statement = update(table).where(table.c.id == bindparam("_id"))
+        if "version" in columns:
+            statement = statement.values(version=table.c.version + 1)
+        for params in statements.values():
+            db.execute(statement, params)
+        db.commit()
+        self._invalidate(ids)
+        return self._get_by_ids(db, ids=ids)
+
+    def remove_multi(self, db: Session, *, ids: List[int]) -> List[ModelType]:
+        """
+        Delete many rows by `id` with one DELETE (association rows go by ON DELETE CASCADE).
+        Returns the removed rows (detached from the session).
+        """
+        objs = self._get_by_ids(db, ids=ids)
+        found = [obj.id for obj in objs]
+        if found:
+            db.execute(delete(self.model.__table__).where(self.model.id.in_(found)))
+            for obj in objs:
+                db.expunge(obj)
+            db.commit()
+            self._invalidate(found)
+        return objs
+
+    def insert_multi(
+        self,
+        db: Session,
+        *,
+        rows: List[Dict[str, Any]],
+        columns: Sequence[str],
+        table: Optional[Table] = None
+    ) -> None:
+        """
+        Insert plain rows into `table` (the model table by default) without building ORM objects:
+        COPY on PostgreSQL (psycopg2), one executemany INSERT elsewhere. Does not commit.
+        """
+        if not rows:
+            return
+        table = self.model.__table__ if table is None else table
+        dialect = db.get_bind().dialect
+        if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+            self._copy_multi(db, table, rows=rows, columns=columns)
+        else:
+            db.execute(insert(table), [{column: row[column] for column in columns} for row in rows])
+
+    def _copy_multi(self, db: Session, table: Table, *, rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row[column]) for column in columns) + "\n")
+        buffer.seek(0)
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+
+    def _update_row(self, db: Session, *, db_obj: ModelType, update_data: Dict[str, Any]) -> None:
+        """
+        UPDATE the row of `db_obj` with the columns in `update_data` (fields from the mapper,
+        other keys are ignored) and bump its version. With UPDATE ... RETURNING the new row
+        comes back in the same statement; other dialects flush and read back the version.
+        """
+        mapper = self.model.__mapper__
+        values = {
+            key: update_data[key] for key in mapper.column_attrs.keys() if key in update_data and key != "version"
+        }
+        if not db.get_bind().dialect.full_returning:
+            for key, value in values.items():
+                setattr(db_obj, key, value)
+            self._bump_version(db_obj)
+            db.flush()
+            # eager_defaults já relê as colunas com server_default; só falta se a version não tiver
+            if "version" in inspect(db_obj).unloaded:
+                db.refresh(db_obj, ["version"])
+            return
+        table = self.model.__table__
+        statement = update(table).where(table.c.id == db_obj.id).values(**values)
+        if "version" in table.columns:
+            statement = statement.values(version=table.c.version + 1)
+        elif not values:
+            return
+        row = db.execute(statement.returning(*table.columns)).one()
+        for prop in mapper.column_attrs:
+            set_committed_value(db_obj, prop.key, row._mapping[prop.columns[0]])
+
+    def _remove_returning(self, db: Session, *, id: Any) -> Optional[ModelType]:
+        table = self.model.__table__
+        statement = delete(table).where(table.c.id == id)
+        if db.get_bind().dialect.full_returning:
+            row = db.execute(statement.returning(*table.columns)).first()
+        else:
+            row = db.execute(select(*table.columns).where(table.c.id == id)).first()
+            if row is not None:
+                db.execute(statement)
+        if row is None:
+            db.rollback()
+            return None
+        # O objeto da linha removida pode já estar na sessão (ex: o usuário autenticado)
+        key = self.model.__mapper__.identity_key_from_primary_key([id])
+        if key in db.identity_map:
+            db.expunge(db.identity_map[key])
+        db.commit()
+        self._invalidate([id])
+        mapper = self.model.__mapper__
+        return self.model(**{prop.key: row._mapping[prop.columns[0]] for prop in mapper.column_attrs})
+
+    def _bump_version(self, db_obj: ModelType) -> None:
+        # Incrementa no banco (version = version + 1), sem depender do valor carregado
+        if "version" in self.model.__table__.columns:
+            db_obj.version = self.model.version + 1
+
+    def _invalidate(self, ids: Iterable[Any]) -> None:
+        """
+        Hook called after rows are created, updated or removed, to drop in-memory caches of these ids.
+        """
+        self._counts.clear()
+
+    def _save_multi(self, db: Session, db_objs: List[ModelType]) -> List[ModelType]:
+        # O flush agrupa os INSERTs (executemany / INSERT ... RETURNING no PostgreSQL)
+        # e as linhas são relidas com um único SELECT após o commit
+        db.add_all(db_objs)
+        db.flush()
+        ids = [db_obj.id for db_obj in db_objs]
+        db.commit()
+        self._invalidate(ids)
+        return self._get_by_ids(db, ids=ids)
+
+    def _replace_associations(self, db: Session, *, db_obj: ModelType, name: str, ids: Iterable[Any]) -> None:
+        """
+        Make the many-to-many relationship `name` of `db_obj` (e.g. "groups") hold exactly `ids`.
+        The association rows are diffed against `ids`: only the missing rows are inserted and
+        the extra ones deleted, one statement each. Ids that do not exist are ignored.
+        """
+        relationship = self.model.__mapper__.relationships[name]
+        (parent_column, owner), = relationship.synchronize_pairs
+        (target_column, target), = relationship.secondary_synchronize_pairs
+        owner_id = getattr(db_obj, parent_column.key)
+        current = set(db.execute(select(target).where(owner == owner_id)).scalars())
+        wanted = set(ids)
+        added = wanted - current
+        if added:
+            added = db.execute(select(target_column).where(target_column.in_(added))).scalars().all()
+            if added:
+                db.execute(insert(relationship.secondary), [{owner.key: owner_id, target.key: id} for id in added])
+        removed = current - wanted
+        if removed:
+            db.execute(delete(relationship.secondary).where(owner == owner_id, target.in_(removed)))
+        # A coleção já carregada na sessão não reflete as linhas alteradas direto na tabela
+        db.expire(db_obj, [name])
+
+    def _get_by_ids(self, db: Session, *, ids: List[Any]) -> List[ModelType]:
+        if not ids:
+            return []
+        # As linhas podem já estar na sessão com valores anteriores a um UPDATE em lote
+        statement = select(self.model).filter(self.model.id.in_(ids)).execution_options(populate_existing=True)
+        rows = db.execute(statement).scalars().all()
+        objs = {row.id: row for row in rows}
+        return [objs[id] for id in dict.fromkeys(ids) if id in objs]
+
+
+def _copy_value(value: Any) -> str:
+    # Formato texto do COPY: \N é nulo; barra invertida, tab e quebras de linha são escapadas
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+class AsyncCRUDBase(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    CRUD object with the same methods as `CRUDBase`, awaited on an `AsyncSession`.
+    """
+
+    async def get(
+        self, db: AsyncSession, id: Any, include: Sequence[str] = (), fields: Sequence[str] = ()
+    ) -> Optional[ModelType]:
+        result = await db.execute(
+            select(self.model).options(*self._load_options(include, fields)).filter(self.model.id == id)
+        )
+        return result.scalars().first()
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 25,
+        cursor: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = (),
+        fields: Sequence[str] = (),
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = ()
+    ) -> List[ModelType]:
+        statement = self._get_multi_statement(skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort)
+        result = await db.execute(statement.options(*self._load_options(include, fields, sort)))
+        return result.scalars().all()
+
+    async def count(
+        self, db: AsyncSession, *, mode: str = "exact", filters: Sequence[Filter] = ()
+    ) -> Optional[int]:
+        return await db.run_sync(lambda session: CRUDBase.count(self, session, mode=mode, filters=filters))
+
+    async def get_version(self, db: AsyncSession, id: Any) -> Optional[int]:
+        result = await db.execute(self._get_version_statement(id))
+        return result.scalar()
+
+    async def get_multi_versions(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 25,
+        cursor: Optional[Dict[str, Any]] = None,
+        filters: Sequence[Filter] = (),
+        sort: Sequence[Tuple[str, bool]] = ()
+    ) -> List[Tuple[Any, int]]:
+        statement = self._get_multi_statement(skip=skip, limit=limit, cursor=cursor, filters=filters, sort=sort)
+        result = await db.execute(statement.with_only_columns(self.model.id, self.model.version))
+        return [tuple(row) for row in result]
+
+    async def stream(
+        self, db: AsyncSession, *, columns: Sequence[str], batch_size: int = 1000
+    ) -> AsyncIterator[List[Tuple]]:
+        result = await db.stream(self._stream_statement(columns))
+        async for rows in result.partitions(batch_size):
+            yield [tuple(row) for row in rows]
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        await self._update_row(db, db_obj=db_obj, update_data=update_data)
+        await db.commit()
+        self._invalidate([db_obj.id])
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int, returning: bool = False) -> Optional[ModelType]:
+        if returning:
+            return await db.run_sync(lambda session: CRUDBase._remove_returning(self, session, id=id))
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
+        self._invalidate([id])
+        return obj
+
+    async def create_multi(self, db: AsyncSession, *, objs_in: List[CreateSchemaType]) -> List[ModelType]:
+        return await db.run_sync(lambda session: CRUDBase.create_multi(self, session, objs_in=objs_in))
+
+    async def update_multi(
+        self, db: AsyncSession, *, objs_in: List[Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        return await db.run_sync(lambda session: CRUDBase.update_multi(self, session, objs_in=objs_in))
+
+    async def remove_multi(self, db: AsyncSession, *, ids: List[int]) -> List[ModelType]:
+        return await db.run_sync(lambda session: CRUDBase.remove_multi(self, session, ids=ids))
+
+    async def _update_row(self, db: AsyncSession, *, db_obj: ModelType, update_data: Dict[str, Any]) -> None:
+        await db.run_sync(
+            lambda session: CRUDBase._update_row(self, session, db_obj=db_obj, update_data=update_data)
+        )
+
+    async def _replace_associations(
+        self, db: AsyncSession, *, db_obj: ModelType, name: str, ids: Iterable[Any]
+    ) -> None:
+        await db.run_sync(
+            lambda session: CRUDBase._replace_associations(self, session, db_obj=db_obj, name=name, ids=ids)
+        )
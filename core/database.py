@@ -1,22 +1,42 @@
-from typing import Any, Generator
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Awaitable, Dict, Generator
 
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 
 from .config import settings
+from .instrumentation import instrument_engine
 
 '''
 Arquivo responsável pelo banco de dados
 
 - Model principal que será herdado pelos outros models de outras app
 - Cria uma instância do banco e finaliza ao finalizar a transação
+- Cria também uma instância assíncrona (asyncio) do banco para os endpoints async
+- Os objetos não expiram no commit: depois de uma escrita não é preciso reler a linha (refresh)
+- Com SQL_INSTRUMENTATION as consultas dos dois engines são contadas por requisição
+- O pool de conexões é configurado pelas settings db_pool_*; com DB_PGBOUNCER o pool fica a cargo do PgBouncer
+- As conexões são verificadas em segundo plano em vez de um SELECT 1 a cada checkout (pool_pre_ping);
+  num erro de desconexão o SQLAlchemy invalida o pool e as conexões antigas são refeitas no próximo checkout;
+  a primeira consulta de cada transação é refeita uma vez numa conexão nova se a do pool estiver morta
+- No SQLite as foreign keys (e o ON DELETE CASCADE das tabelas de associação) são ativadas em cada conexão
 '''
 
+logger = logging.getLogger(__name__)
+
 @as_declarative()
 class Base:
     id: Any
     __name__: str
+    # Valores gerados pelo banco voltam no próprio INSERT/UPDATE (RETURNING), sem SELECT depois
+    __mapper_args__ = {"eager_defaults": True}
     # Generate __tablename__ automatically
     @declared_attr
     def __tablename__(cls) -> str:
@@ -25,12 +45,150 @@ class Base:
 
 SQLALCHEMY_DATABASE_URI: str = f"{settings.db_connection}://{settings.db_username}:{settings.db_password}@{settings.db_host}:{settings.db_port}/{settings.db_database}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Driver asyncio equivalente para cada DB_CONNECTION suportado
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_uri(uri: str) -> str:
+    """
+    Same database as `uri` through the asyncio driver.
+    """
+    connection, separator, rest = uri.partition("://")
+    return (settings.db_async_connection or ASYNC_DRIVERS.get(connection, connection)) + separator + rest
+
+
+SQLALCHEMY_ASYNC_DATABASE_URI: str = async_uri(SQLALCHEMY_DATABASE_URI)
+
+
+def engine_options(uri: str) -> Dict[str, Any]:
+    """
+    Pool arguments of create_engine for the database `uri`.
+    """
+    if settings.db_pgbouncer:
+        if "+asyncpg" in uri:
+            # Em modo transaction cada transação pode ir para outra conexão do servidor, sem os prepared statements
+            return {"poolclass": NullPool, "connect_args": {"statement_cache_size": 0, "prepared_statement_cache_size": 0}}
+        return {"poolclass": NullPool}
+    if uri.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+
+def enable_foreign_keys(engine: Engine) -> None:
+    """
+    Turn on foreign keys in every SQLite connection of `engine`; SQLite ignores them by default,
+    so the association rows would outlive a deleted row (ON DELETE CASCADE) and its reused id.
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_foreign_keys)
+
+
+def _sqlite_foreign_keys(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+class ReconnectingSession(Session):
+    """
+    Session that runs the first statement of a transaction once more, on a new connection, when
+    the pooled connection turns out to be dead (database restart, failover, idle timeout) before
+    the background validator noticed. Later statements are not retried: the transaction
+    already did work on the lost connection.
+    """
+    _executed_in: Any = None
+
+    def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        # Transação que ainda não executou nada: nenhuma (antes do autobegin) ou outra depois do commit/rollback
+        retry = (
+            (not self.in_transaction() or self.get_transaction() is not self._executed_in)
+            and not (self.new or self.dirty or self.deleted)
+        )
+        try:
+            result = super().execute(statement, *args, **kwargs)
+        except DBAPIError as error:
+            if not (retry and error.connection_invalidated):
+                raise
+            logger.warning("Database connection lost, running the statement again on a new connection")
+            self.rollback()
+            result = super().execute(statement, *args, **kwargs)
+        self._executed_in = self.get_transaction()
+        return result
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URI, **engine_options(SQLALCHEMY_DATABASE_URI))
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine, class_=ReconnectingSession
+)
+
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URI, **engine_options(SQLALCHEMY_ASYNC_DATABASE_URI))
+AsyncSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=async_engine, class_=AsyncSession,
+    sync_session_class=ReconnectingSession,
+)
+
+enable_foreign_keys(engine)
+enable_foreign_keys(async_engine.sync_engine)
+
+if settings.sql_instrumentation:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
 
 def get_db() -> Generator:
     try:
         db = SessionLocal()
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def validate_connection(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+async def validate_async_connection() -> None:
+    async with async_engine.connect() as connection:
+        await connection.exec_driver_sql("SELECT 1")
+
+
+async def validate_connections_periodically() -> None:
+    """
+    Check the database connections every db_pool_validate_interval seconds. A disconnect
+    invalidates the pool, so no request gets a dead connection from before the failure.
+
+    Only one connection per engine is pinged: a disconnect on it invalidates every connection
+    opened before it, which covers a database restart or failover. Pinging each pooled connection
+    would take all of them from the requests at once; a single connection closed on its own
+    (idle timeout) is covered by db_pool_recycle and by ReconnectingSession.
+    """
+    while True:
+        await asyncio.sleep(settings.db_pool_validate_interval)
+        await _validate(run_in_threadpool(validate_connection, engine))
+        await _validate(validate_async_connection())
+
+
+async def _validate(validation: Awaitable) -> None:
+    try:
+        await validation
+    except DBAPIError as error:
+        if error.connection_invalidated:
+            logger.warning("Database connection lost, pooled connections will be reopened")
+        else:
+            logger.exception("Could not validate the database connections")
+    except Exception:
+        logger.exception("Could not validate the database connections")
@@ -0,0 +1,38 @@
+import hashlib
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+'''
+Arquivo com o suporte a ETag e GET condicional (If-None-Match)
+
+- O ETag é gerado a partir da url da requisição e da versão das linhas retornadas
+- Quando o ETag enviado pelo cliente é o mesmo, a resposta é 304 sem corpo
+'''
+
+
+def make_etag(request: Request, version: Any) -> str:
+    data = f"{request.url.path}?{request.url.query}:{version!r}".encode()
+    return f'"{hashlib.sha1(data).hexdigest()}"'
+
+
+def has_if_none_match(request: Request) -> bool:
+    return "if-none-match" in request.headers
+
+
+def not_modified(request: Request, version: Any) -> Optional[Response]:
+    """
+    304 response when the If-None-Match header matches the ETag of `version`, otherwise None.
+    """
+    if version is None:
+        return None
+    etag = make_etag(request, version)
+    tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if "*" in tags or etag in tags or f"W/{etag}" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def set_etag(request: Request, response: Response, version: Any) -> None:
+    response.headers["ETag"] = make_etag(request, version)
@@ -0,0 +1,63 @@
+import csv
+import io
+from typing import AsyncIterator, Iterable, Iterator, List, Sequence, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Table
+
+'''
+Arquivo com a exportação em streaming (ndjson ou csv)
+
+- As linhas são lidas do banco em lotes (cursor no servidor) e escritas em pedaços na resposta
+- Cada lote vira um único pedaço da resposta, a memória não cresce com o tamanho da tabela
+- As colunas exportadas são os campos do schema de saída que existem na tabela
+'''
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_columns(schema: Type[BaseModel], table: Table) -> List[str]:
+    return [name for name in schema.__fields__ if name in table.c]
+
+
+def _dumps(data: dict) -> bytes:
+    return orjson.dumps(data, default=str) + b"\n"
+
+
+def _ndjson_chunk(columns: Sequence[str], rows: List[Tuple]) -> bytes:
+    return b"".join(_dumps(dict(zip(columns, row))) for row in rows)
+
+
+def _csv_chunk(rows: Iterable[Tuple]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def export_chunks(format: str, columns: Sequence[str], batches: Iterable[List[Tuple]]) -> Iterator[bytes]:
+    """
+    Chunks of the response body, one per batch of rows.
+    """
+    if format == "csv":
+        yield _csv_chunk([columns])
+        for rows in batches:
+            yield _csv_chunk(rows)
+    else:
+        for rows in batches:
+            yield _ndjson_chunk(columns, rows)
+
+
+async def export_chunks_async(
+    format: str, columns: Sequence[str], batches: AsyncIterator[List[Tuple]]
+) -> AsyncIterator[bytes]:
+    if format == "csv":
+        yield _csv_chunk([columns])
+        async for rows in batches:
+            yield _csv_chunk(rows)
+    else:
+        async for rows in batches:
+            yield _ndjson_chunk(columns, rows)
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+from sqlalchemy.orm import load_only
+
+'''
+Arquivo com a seleção de campos da resposta (fields=id,email)
+
+- Só as colunas pedidas são lidas do banco (load_only), além do id e da version
+- A resposta usa um schema reduzido, só com os campos pedidos; relacionamentos continuam controlados pelo include
+'''
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """
+    Names of the `fields` query parameter, which must be non nested fields of `schema`.
+    """
+    if not fields:
+        return ()
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    allowed = {name for name, field in schema.__fields__.items() if not _is_nested(field)}
+    invalid = [name for name in names if name not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(invalid)}")
+    return names
+
+
+def fields_options(model: Any, fields: Sequence[str]) -> List[Any]:
+    """
+    load_only option with `fields` plus the columns used internally (id for pagination, version for the ETag).
+    """
+    if not fields:
+        return []
+    columns = model.__table__.columns
+    names = dict.fromkeys(["id", *(["version"] if "version" in columns else []), *fields])
+    return [load_only(*[getattr(model, name) for name in names])]
+
+
+@lru_cache(maxsize=256)
+def trimmed_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Copy of `schema` with only `fields` (nested fields are kept, they are controlled by include).
+    """
+    if not fields:
+        return schema
+    definitions = {
+        name: (field.outer_type_, field.field_info)
+        for name, field in schema.__fields__.items()
+        if name in fields or _is_nested(field)
+    }
+    return create_model(f"{schema.__name__}Fields", __config__=schema.__config__, **definitions)
+
+
+def _is_nested(field: Any) -> bool:
+    return isinstance(field.type_, type) and issubclass(field.type_, BaseModel)
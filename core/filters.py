@@ -0,0 +1,110 @@
+import operator
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Table, UniqueConstraint
+
+'''
+Arquivo com os filtros e a ordenação das listagens (filter=email:eq:a@a.com&sort=-username)
+
+- Cada crud define as colunas filtráveis (filterable) e ordenáveis (sortable)
+- Só colunas com índice podem ser usadas, a não ser que estejam liberadas em unindexed
+- A validação dos índices acontece ao criar o crud, uma coluna sem índice impede a app de subir
+'''
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda column, values: column.in_(values),
+    "prefix": lambda column, value: column.startswith(value, autoescape=True),
+}
+
+TRUE_VALUES = {"true", "1", "yes"}
+FALSE_VALUES = {"false", "0", "no"}
+
+
+class Filter(NamedTuple):
+    name: str
+    op: str
+    value: Any
+
+
+def parse_filters(values: Iterable[str], columns: Dict[str, Column]) -> Tuple[Filter, ...]:
+    """
+    Filters written as `name:op:value` ("in" takes values separated by |), with the value
+    converted to the type of the column of `name` in `columns` (the allowlist).
+    """
+    filters = []
+    for value in values:
+        name, _, rest = value.partition(":")
+        op, _, raw = rest.partition(":")
+        if name not in columns or op not in OPERATORS:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {value}")
+        try:
+            if op == "in":
+                converted = tuple(_convert(columns[name], item) for item in raw.split("|"))
+            else:
+                converted = _convert(columns[name], raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid filter value: {value}")
+        filters.append(Filter(name, op, converted))
+    return tuple(filters)
+
+
+def parse_sort(sort: Optional[str], allowed: Iterable[str]) -> Tuple[Tuple[str, bool], ...]:
+    """
+    (name, descending) of each key of `sort`, e.g. "-username,email".
+    """
+    if not sort:
+        return ()
+    keys = []
+    allowed = set(allowed)
+    for key in sort.split(","):
+        key = key.strip()
+        name = key.lstrip("-")
+        if name not in allowed:
+            raise HTTPException(status_code=400, detail=f"Invalid sort: {key}")
+        keys.append((name, key.startswith("-")))
+    return tuple(dict.fromkeys(keys))
+
+
+def _convert(column: Column, value: str) -> Any:
+    python_type = column.type.python_type
+    if python_type is bool:
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValueError(value)
+    return python_type(value)
+
+
+def is_indexed(column: Column) -> bool:
+    """
+    Whether an index (or primary key / unique constraint) of the table starts with `column`.
+    """
+    table: Table = column.table
+    leading = [list(index.columns)[0] for index in table.indexes]
+    leading += [
+        list(constraint.columns)[0] for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and len(constraint.columns)
+    ]
+    if len(table.primary_key.columns):
+        leading.append(list(table.primary_key.columns)[0])
+    return any(other is column for other in leading) or bool(column.unique) or bool(column.index)
+
+
+def check_indexes(columns: Dict[str, Column], unindexed: Iterable[str]) -> None:
+    missing: List[str] = [
+        f"{column.table.name}.{column.name}" for name, column in columns.items()
+        if name not in unindexed and not is_indexed(column)
+    ]
+    if missing:
+        raise ValueError(
+            f"Columns used for filter or sort without an index: {', '.join(missing)}. "
+            "Add an index or list them in unindexed."
+        )
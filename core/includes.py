@@ -0,0 +1,41 @@
+from typing import Any, Collection, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import selectinload
+
+'''
+Arquivo com o carregamento opcional de relacionamentos (include=groups,groups.permissions)
+
+- Cada relacionamento pedido vira um selectinload: uma consulta por relacionamento, não por linha
+- Cada crud define os caminhos permitidos (includes), caminhos fora dessa lista retornam 400
+- Relacionamentos não pedidos não são carregados nem retornados na resposta
+'''
+
+
+def parse_include(include: Optional[str], allowed: Collection[str]) -> Tuple[str, ...]:
+    """
+    Paths of the `include` query parameter, parents included ("groups.permissions" adds "groups").
+    """
+    if not include:
+        return ()
+    paths = [path.strip() for path in include.split(",") if path.strip()]
+    invalid = [path for path in paths if path not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid include: {', '.join(invalid)}")
+    parents = [".".join(path.split(".")[:index]) for path in paths for index in range(1, path.count(".") + 1)]
+    return tuple(dict.fromkeys(parents + paths))
+
+
+def include_options(model: Any, include: Sequence[str]) -> List[Any]:
+    """
+    One selectinload option per path of `include`, following the relationships of `model`.
+    """
+    options = []
+    for path in include:
+        option, current = None, model
+        for name in path.split("."):
+            attribute = getattr(current, name)
+            option = selectinload(attribute) if option is None else option.selectinload(attribute)
+            current = attribute.property.mapper.class_
+        options.append(option)
+    return options
@@ -0,0 +1,152 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+'''
+Arquivo com a instrumentação das consultas SQL por requisição (SQL_INSTRUMENTATION=true)
+
+- Eventos do engine contam as consultas, o tempo total no banco e a consulta mais lenta de cada requisição
+- Os números vão no header Server-Timing e num log estruturado (json) ao final da requisição
+- Um mesmo SQL repetido muitas vezes na requisição (N+1) gera um aviso no log
+- query_budget limita o número de consultas de um trecho de código, para uso nos testes
+'''
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        """
+        Queries executed during a request (or a `query_budget` block).
+
+        **Parameters**
+
+        * `parent`: Enclosing stats, which also receive every query recorded here
+        """
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: Optional[str] = None
+        self.slowest_duration = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if duration > self.slowest_duration:
+            self.slowest, self.slowest_duration = statement, duration
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def repeated(self, threshold: int) -> Iterator[Any]:
+        """
+        (statement, times) of the statements executed at least `threshold` times, a sign of N+1 queries.
+        """
+        return ((statement, times) for statement, times in self.statements.items() if times >= threshold)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+# Início de cada consulta por contexto de execução: uma consulta que falha não deixa o seu na conexão
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", {})[context] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started"].pop(context)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context) -> None:
+    if exception_context.connection is not None:
+        exception_context.connection.info.get("query_started", {}).pop(exception_context.execution_context, None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Collect the queries of each request, send them in the Server-Timing header and log them.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(parent=_current.get())
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.log(scope, status_code, stats)
+
+    def log(self, scope: Scope, status_code: int, stats: QueryStats) -> None:
+        logger.info(json.dumps({
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "slowest_ms": round(stats.slowest_duration * 1000, 2),
+            "slowest": stats.slowest,
+        }))
+        for statement, times in stats.repeated(settings.n_plus_one_threshold):
+            logger.warning(json.dumps({
+                "event": "n_plus_one",
+                "method": scope["method"],
+                "path": scope["path"],
+                "times": times,
+                "statement": statement,
+            }))
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fail with AssertionError when the block runs more than `max_queries` queries.
+
+        with query_budget(3):
+            client.get("/api/v1/authentication/users/?include=groups")
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    assert stats.count <= max_queries, (
+        f"{stats.count} queries, budget is {max_queries}:\n" + "\n".join(stats.statements)
+    )
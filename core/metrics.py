@@ -0,0 +1,251 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import security
+from .cache import TTLCache
+from .config import settings
+
+'''
+Arquivo com as métricas da aplicação no formato do Prometheus (METRICS_ENABLED=true, rota /metrics)
+
+- Latência por rota, requisições em andamento, pool de conexões do banco, threadpool do Starlette, bcrypt, jwt
+  e acertos dos caches em memória
+- O threadpool do Starlette é o executor padrão do loop: a app usa o InstrumentedThreadPoolExecutor deste
+  arquivo, que conta as chamadas na fila e em execução
+- Com vários workers (gunicorn) defina PROMETHEUS_MULTIPROC_DIR: cada processo grava as métricas
+  em arquivos nesse diretório e a rota /metrics soma os valores de todos
+- Só é importado com as métricas habilitadas: desabilitado não há custo nas requisições
+'''
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Connection pool size", ["engine"], multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections in use", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened above the pool size", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT_MAX = Gauge(
+    "db_pool_checked_out_max", "Most connections in use at once since the last sample", ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connections taken from the pool", ["engine"])
+DB_POOL_OVERFLOW_CHECKOUTS = Counter(
+    "db_pool_overflow_checkouts",
+    "Checkouts that found every pool_size connection in use (used an overflow connection or waited)", ["engine"],
+)
+THREADPOOL_MAX_WORKERS = Gauge(
+    "threadpool_max_workers", "Worker threads allowed in the Starlette threadpool", multiprocess_mode="livesum",
+)
+THREADPOOL_RUNNING = Gauge(
+    "threadpool_running", "Calls running in the Starlette threadpool", multiprocess_mode="livesum",
+)
+THREADPOOL_QUEUED = Gauge(
+    "threadpool_queued", "Calls waiting for a thread in the Starlette threadpool", multiprocess_mode="livesum",
+)
+BCRYPT_WAIT = Histogram("bcrypt_wait_seconds", "Time waiting for a bcrypt worker")
+BCRYPT_DURATION = Histogram("bcrypt_duration_seconds", "bcrypt hash and verify time", buckets=(
+    .01, .025, .05, .1, .25, .5, 1, 2.5, 5,
+))
+BCRYPT_IN_FLIGHT = Gauge(
+    "bcrypt_in_flight", "Password hashes running or queued", multiprocess_mode="livesum",
+)
+CACHE_HITS = Gauge("cache_hits", "Lookups found in the cache", ["cache"], multiprocess_mode="livesum")
+CACHE_MISSES = Gauge("cache_misses", "Lookups not found in the cache", ["cache"], multiprocess_mode="livesum")
+CACHE_HIT_RATE = Gauge(
+    "cache_hit_rate", "Hits over lookups of the cache in this process", ["cache"], multiprocess_mode="liveall",
+)
+JWT_DURATION = Histogram("jwt_duration_seconds", "JWT encode and decode time", ["operation"], buckets=(
+    .00005, .0001, .00025, .0005, .001, .0025, .005, .01,
+))
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, routes: list):
+        """
+        Latency of each request labeled by the route path (e.g. /api/v1/authentication/users/{user_id}).
+
+        **Parameters**
+
+        * `routes`: Routes of the app, used to find the path of the endpoint that handled the request
+        """
+        self.app = app
+        self.routes = routes
+        self._paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            REQUEST_DURATION.labels(scope["method"], self.route(scope), status_code).observe(
+                time.perf_counter() - started
+            )
+
+    def route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._paths:
+            self._paths.update(
+                (route.endpoint, route.path) for route in self.routes if hasattr(route, "endpoint")
+            )
+        return self._paths.get(endpoint, "unmatched")
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        ThreadPoolExecutor that counts its queued and running calls.
+
+        **Parameters**
+
+        * `max_workers`: Worker threads, by default the same as the default executor of asyncio
+        """
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        super().__init__(max_workers=self.max_workers, thread_name_prefix="threadpool")
+        self.queued = 0
+        self.running = 0
+        self._counts_lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        with self._counts_lock:
+            self.queued += 1
+        try:
+            future = super().submit(self._run, fn, *args, **kwargs)
+        except BaseException:
+            self._dequeue()
+            raise
+        # Cancelada antes de começar (ex.: requisição cancelada): _run nunca tira a chamada da fila
+        future.add_done_callback(lambda future: future.cancelled() and self._dequeue())
+        return future
+
+    def _run(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        with self._counts_lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._counts_lock:
+                self.running -= 1
+
+    def _dequeue(self) -> None:
+        with self._counts_lock:
+            self.queued -= 1
+
+
+# Executor padrão do loop (o threadpool do Starlette), definido ao iniciar a app
+threadpool = InstrumentedThreadPoolExecutor()
+
+# Maior número de conexões em uso de cada engine desde a última amostra
+_checked_out_max: Dict[str, int] = {}
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """
+    Count the checkouts of the `engine` pool and track the most connections in use between samples.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    checkouts = DB_POOL_CHECKOUTS.labels(name)
+    overflow_checkouts = DB_POOL_OVERFLOW_CHECKOUTS.labels(name)
+    _checked_out_max[name] = 0
+
+    @event.listens_for(engine, "checkout")
+    def count_checkout(dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        checked_out = engine.pool.checkedout()
+        checkouts.inc()
+        if checked_out > engine.pool.size():
+            overflow_checkouts.inc()
+        if checked_out > _checked_out_max[name]:
+            _checked_out_max[name] = checked_out
+
+
+def observe_bcrypt(wait: float, duration: float) -> None:
+    BCRYPT_WAIT.observe(wait)
+    BCRYPT_DURATION.observe(duration)
+
+
+def observe_jwt(operation: str, duration: float) -> None:
+    JWT_DURATION.labels(operation).observe(duration)
+
+
+def sample(engines: Dict[str, Engine], caches: Dict[str, TTLCache]) -> None:
+    """
+    Update the gauges read from the pools (database, threadpool and bcrypt) and caches of this process.
+    """
+    for name, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            checked_out = pool.checkedout()
+            DB_POOL_SIZE.labels(name).set(pool.size())
+            DB_POOL_CHECKED_OUT.labels(name).set(checked_out)
+            DB_POOL_CHECKED_OUT_MAX.labels(name).set(max(_checked_out_max.get(name, 0), checked_out))
+            DB_POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+            _checked_out_max[name] = checked_out
+    THREADPOOL_MAX_WORKERS.set(threadpool.max_workers)
+    THREADPOOL_RUNNING.set(threadpool.running)
+    THREADPOOL_QUEUED.set(threadpool.queued)
+    BCRYPT_IN_FLIGHT.set(security.password_hasher.in_flight)
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_HITS.labels(name).set(stats["hits"])
+        CACHE_MISSES.labels(name).set(stats["misses"])
+        CACHE_HIT_RATE.labels(name).set(stats["hit_rate"])
+
+
+async def sample_periodically(engines: Dict[str, Engine], caches: Dict[str, TTLCache]) -> None:
+    while True:
+        sample(engines, caches)
+        await asyncio.sleep(settings.metrics_sample_interval)
+
+
+def install(engines: Dict[str, Engine]) -> None:
+    for name, engine in engines.items():
+        instrument_pool(engine, name)
+    security.password_hasher.observer = observe_bcrypt
+    security.jwt_observer = observe_jwt
+
+
+async def metrics(request: Request) -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
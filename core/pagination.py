@@ -0,0 +1,73 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from starlette.requests import Request
+from starlette.responses import Response
+
+'''
+Arquivo com a paginação por cursor (keyset) dos endpoints de listagem
+
+- O cursor é opaco para o cliente: um json com a chave de ordenação codificado em base64
+- O próximo cursor é retornado nos headers Link e X-Next-Cursor
+- O total de linhas (count=exact|estimated) é retornado no header X-Total-Count
+- Com sort= o cursor guarda também o valor das colunas de ordenação da última linha
+'''
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except ValueError:
+        values = None
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def next_cursor(items: List[Any], limit: int, sort: Sequence[Tuple[str, bool]] = ()) -> Optional[str]:
+    """
+    Cursor for the page after `items`, or None when this is the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+    names = dict.fromkeys([*(name for name, _ in sort), "id"])
+    return encode_cursor({name: getattr(items[-1], name) for name in names})
+
+
+def keyset_clause(keys: List[Tuple[Any, bool]], cursor: Dict[str, Any]) -> Any:
+    """
+    Rows after `cursor` in the order of `keys` [(column, descending)]:
+    (a > x) or (a = x and b > y) or ...
+    """
+    if any(column.key not in cursor for column, _ in keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    clauses = []
+    for index, (column, descending) in enumerate(keys):
+        value = cursor[column.key]
+        after = column < value if descending else column > value
+        clauses.append(and_(*[other == cursor[other.key] for other, _ in keys[:index]], after))
+    return or_(*clauses)
+
+
+def set_pagination_headers(request: Request, response: Response, cursor: Optional[str]) -> None:
+    if cursor is None:
+        return
+    url = request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+    response.headers["Link"] = f'<{url}>; rel="next"'
+    response.headers["X-Next-Cursor"] = cursor
+
+
+def set_total_count(response: Response, total: Optional[int]) -> None:
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
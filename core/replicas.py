@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import AsyncGenerator, Generator, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .database import (
+    AsyncSessionLocal, ReconnectingSession, SessionLocal, async_uri, enable_foreign_keys, engine_options
+)
+from .instrumentation import instrument_engine
+
+'''
+Arquivo com o roteamento das leituras para as réplicas do banco (DB_REPLICA_URLS)
+
+- Os endpoints de leitura usam get_read_db / get_async_read_db no lugar de get_db / get_async_db
+- A réplica é escolhida por round_robin ou least_connections entre as que estão no ar e sem atraso
+- Uma verificação em segundo plano mede o atraso de cada réplica; réplica fora do ar ou atrasada não recebe leituras
+- Sem réplica disponível, a leitura vai para o primário
+- Depois de uma escrita o cliente recebe um cookie e lê do primário por alguns segundos (lê o que acabou de escrever)
+'''
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Atraso da réplica em segundos no PostgreSQL, 0 quando já aplicou tudo que recebeu do primário
+POSTGRESQL_LAG = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, uri: str):
+        """
+        Sync and async engines of one read replica, with its health and the sessions in use.
+        """
+        self.engine = create_engine(uri, **engine_options(uri))
+        self.async_engine = create_async_engine(async_uri(uri), **engine_options(async_uri(uri)))
+        self.session = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine, class_=ReconnectingSession
+        )
+        self.async_session = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.async_engine, class_=AsyncSession,
+            sync_session_class=ReconnectingSession,
+        )
+        enable_foreign_keys(self.engine)
+        enable_foreign_keys(self.async_engine.sync_engine)
+        if settings.sql_instrumentation:
+            instrument_engine(self.engine)
+            instrument_engine(self.async_engine.sync_engine)
+        self.name = repr(self.engine.url)
+        self.healthy = True
+        self.lag = 0.0
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            self.in_use += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+    def check(self) -> None:
+        """
+        Update `healthy` with the connection state and the replication lag.
+        """
+        try:
+            with self.engine.connect() as connection:
+                lag = 0
+                if self.engine.dialect.name == "postgresql":
+                    lag = connection.exec_driver_sql(POSTGRESQL_LAG).scalar()
+        except Exception:
+            if self.healthy:
+                logger.exception("Read replica %s is down", self.name)
+            self.healthy = False
+            return
+        self.lag = float(lag or 0)
+        healthy = self.lag <= settings.db_replica_max_lag
+        if healthy != self.healthy:
+            logger.warning("Read replica %s is %s (lag %.1fs)", self.name, "back" if healthy else "lagging", self.lag)
+        self.healthy = healthy
+
+    def fail(self) -> None:
+        logger.exception("Read replica %s is down, reading from the primary", self.name)
+        self.healthy = False
+
+
+class ReplicaSet:
+    def __init__(self, uris: List[str], selection: str):
+        """
+        Read replicas of the primary database.
+
+        **Parameters**
+
+        * `uris`: Database uri of each replica
+        * `selection`: round_robin or least_connections
+        """
+        self.replicas = [Replica(uri) for uri in uris]
+        self.selection = selection
+        self._counter = itertools.count()
+
+    def select(self) -> Optional[Replica]:
+        """
+        Replica for the next read, None when no replica is available.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.selection == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+        return healthy[next(self._counter) % len(healthy)]
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            replica.check()
+
+
+replicas = ReplicaSet(settings.db_replica_urls, settings.db_replica_selection)
+
+
+def reads_from_primary(request: Request) -> bool:
+    """
+    Whether the client wrote recently (read-your-writes cookie) or there is no replica.
+    """
+    if not replicas.replicas:
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_db(request: Request) -> Generator:
+    replica = None if reads_from_primary(request) else replicas.select()
+    if replica is not None:
+        db = replica.session()
+        try:
+            db.connection()
+            replica.acquire()
+        except DBAPIError:
+            db.close()
+            replica.fail()
+            replica = None
+    if replica is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        if replica is not None:
+            replica.release()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator:
+    replica = None if reads_from_primary(request) else replicas.select()
+    if replica is not None:
+        db = replica.async_session()
+        try:
+            await db.connection()
+            replica.acquire()
+        except DBAPIError:
+            await db.close()
+            replica.fail()
+            replica = None
+    if replica is None:
+        db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+        if replica is not None:
+            replica.release()
+
+
+async def check_replicas_periodically() -> None:
+    while True:
+        await run_in_threadpool(replicas.check)
+        await asyncio.sleep(settings.db_replica_check_interval)
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Set the cookie that sends the reads of the client to the primary after a successful write.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.db_read_your_writes_seconds
+                MutableHeaders(scope=message).append(
+                    "Set-Cookie",
+                    f"{READ_PRIMARY_COOKIE}={time.time() + window:.3f}; Max-Age={window}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,68 @@
+from functools import lru_cache
+from typing import Any, Collection, List, Optional, Tuple, Type
+
+import orjson  # noqa: F401 (o ORJSONResponse só verifica o orjson ao serializar: a falta dele aparece ao importar)
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+from starlette.responses import Response
+
+'''
+Arquivo com o modo rápido de serialização das respostas (FAST_RESPONSES=true)
+
+- Os objetos do banco são convertidos direto para dict pelos campos do schema, sem validar com o pydantic
+- O dict é serializado com orjson, sem passar pelo jsonable_encoder
+- Só deve ser usado com objetos carregados do banco, que já respeitam o schema
+- Campos com schema aninhado (relacionamentos) só são lidos quando pedidos no include
+'''
+
+
+@lru_cache(maxsize=None)
+def _fields(schema: Type[BaseModel]) -> List[Tuple[str, str, Optional[Type[BaseModel]], bool]]:
+    """
+    (attribute, key, nested schema, is list) of each field of `schema`, computed once per schema.
+    """
+    fields = []
+    for name, field in schema.__fields__.items():
+        nested = field.type_ if isinstance(field.type_, type) and issubclass(field.type_, BaseModel) else None
+        fields.append((name, field.alias, nested, field.shape != SHAPE_SINGLETON))
+    return fields
+
+
+def serialize(obj: Any, schema: Type[BaseModel], include: Collection[str] = (), prefix: str = "") -> Any:
+    """
+    Dict with the fields of `schema` read from the ORM object `obj`. Nested schemas are only
+    read when their path is in `include`, otherwise the key is left out (and never lazy loaded).
+    """
+    data = {}
+    for name, key, nested, many in _fields(schema):
+        if nested is None:
+            data[key] = getattr(obj, name)
+            continue
+        path = prefix + name
+        if path not in include:
+            continue
+        value = getattr(obj, name)
+        if value is not None:
+            value = (
+                [serialize(item, nested, include, f"{path}.") for item in value]
+                if many else serialize(value, nested, include, f"{path}.")
+            )
+        data[key] = value
+    return data
+
+
+def fast_response(
+    response: Response, objs: Any, schema: Type[BaseModel], include: Collection[str] = (), many: bool = True
+) -> Response:
+    """
+    JSON response with `objs` (a single object when `many` is False) serialized through `schema`,
+    keeping the headers already set on `response` (pagination, ETag), which FastAPI drops when
+    a Response is returned.
+    """
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return ORJSONResponse(
+        [serialize(obj, schema, include) for obj in objs] if many else serialize(objs, schema, include),
+        status_code=response.status_code or 200,
+        headers=headers,
+    )
@@ -1,33 +1,184 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
+from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
 
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 8 # 8 days
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_MINUTES = settings.refresh_token_expire_minutes
 
 '''
 Arquivo de configuração de segurança dos tokens JWT
 
 - Métodos de verificação e criação de hash de senha
-- Método para criar o token jwt válido
+- O bcrypt roda num pool de threads próprio com fila limitada: com a fila cheia a requisição
+  falha na hora com 503 e Retry-After, sem ocupar o threadpool compartilhado do Starlette
+- Método para criar o token jwt válido (curta duração) e o refresh token (longa duração)
+- Cada token possui um id (claim jti) usado para revogá-lo
+- O token pode incluir as permissões do usuário (claim perms), se couber em settings.token_max_size
 '''
 
+class PasswordHasher:
+    def __init__(self, workers: int, queue_size: int):
+        """
+        Dedicated thread pool for bcrypt (the bcrypt C code releases the GIL).
+
+        **Parameters**
+
+        * `workers`: Number of hashes computed in parallel
+        * `queue_size`: Number of hashes allowed to wait for a worker before rejecting new ones
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.count = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+        # Chamado com (espera, duração) de cada hash, usado pelas métricas
+        self.observer: Optional[Callable[[float, float], None]] = None
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many password hashing requests, try again later",
+                headers={"Retry-After": str(settings.password_hash_retry_after)},
+            )
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._executor.submit(self._run, time.perf_counter(), fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0),
+            "count": self.count,
+            "rejected": self.rejected,
+            "wait_seconds": self.wait_seconds,
+            "hash_seconds": self.hash_seconds,
+            "max_hash_seconds": self.max_hash_seconds,
+        }
+
+    def _run(self, submitted_at: float, fn: Callable, *args: Any) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                self.count += 1
+                self.wait_seconds += started_at - submitted_at
+                self.hash_seconds += elapsed
+                self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+            self._release()
+            if self.observer is not None:
+                self.observer(started_at - submitted_at, elapsed)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size)
+
+# Chamado com (operação, duração) de cada encode/decode de jwt, usado pelas métricas
+jwt_observer: Optional[Callable[[str, float], None]] = None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.run(pwd_context.hash, password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords in parallel, `password_hasher.workers` at a time.
+    """
+    hashes = []
+    for start in range(0, len(passwords), password_hasher.workers):
+        futures = [
+            password_hasher.submit(pwd_context.hash, password)
+            for password in passwords[start:start + password_hasher.workers]
+        ]
+        hashes.extend(future.result() for future in futures)
+    return hashes
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run_async(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run_async(pwd_context.hash, password)
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    hashes = []
+    for start in range(0, len(passwords), password_hasher.workers):
+        hashes.extend(await asyncio.gather(*(
+            get_password_hash_async(password)
+            for password in passwords[start:start + password_hasher.workers]
+        )))
+    return hashes
+
+
+def encode_jwt(claims: Dict[str, Any]) -> str:
+    if jwt_observer is None:
+        return jwt.encode(claims, settings.app_secret, algorithm=ALGORITHM)
+    started_at = time.perf_counter()
+    encoded_jwt = jwt.encode(claims, settings.app_secret, algorithm=ALGORITHM)
+    jwt_observer("encode", time.perf_counter() - started_at)
+    return encoded_jwt
+
+
+def decode_jwt(token: str) -> Dict[str, Any]:
+    if jwt_observer is None:
+        return jwt.decode(token, settings.app_secret, algorithms=[ALGORITHM])
+    started_at = time.perf_counter()
+    try:
+        return jwt.decode(token, settings.app_secret, algorithms=[ALGORITHM])
+    finally:
+        jwt_observer("decode", time.perf_counter() - started_at)
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    permissions: Optional[Iterable[str]] = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -35,6 +186,24 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.app_secret, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex, "type": "access"}
+    if permissions is not None:
+        encoded_jwt = encode_jwt({**to_encode, "perms": sorted(permissions)})
+        if len(encoded_jwt) <= settings.token_max_size:
+            return encoded_jwt
+    encoded_jwt = encode_jwt(to_encode)
+    return encoded_jwt
+
+
+def create_refresh_token(
+    subject: Union[str, Any], expires_delta: timedelta = None
+) -> str:
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(
+            minutes=REFRESH_TOKEN_EXPIRE_MINUTES
+        )
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex, "type": "refresh"}
+    encoded_jwt = encode_jwt(to_encode)
+    return encoded_jwt
@@ -1,9 +1,20 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 
 # from app.api.api_v1.api import api_router
 from core.config import settings
 from core.api import api_router
+from core.database import async_engine, engine, validate_connections_periodically
+from core.instrumentation import QueryStatsMiddleware
+from core.replicas import ReadYourWritesMiddleware, check_replicas_periodically, replicas
+from authentication.cache import principal_cache, token_cache
+from authentication.security import sync_revoked_tokens, sync_revoked_tokens_periodically
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.app_name, 
@@ -20,4 +31,42 @@ if settings.backend_cors_origins:
         allow_headers=["*"],
     )
 
-app.include_router(api_router)
\ No newline at end of file
+if settings.sql_instrumentation:
+    app.add_middleware(QueryStatsMiddleware)
+
+if replicas.replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+app.include_router(api_router)
+
+# Importado só quando habilitado: sem métricas não há nenhum custo nas requisições
+if settings.metrics_enabled:
+    from core import metrics
+
+    metrics_engines = {"sync": engine, "async": async_engine.sync_engine}
+    for index, replica in enumerate(replicas.replicas, 1):
+        metrics_engines[f"replica{index}_sync"] = replica.engine
+        metrics_engines[f"replica{index}_async"] = replica.async_engine.sync_engine
+    metrics_caches = {"principal_cache": principal_cache, "token_cache": token_cache}
+    metrics.install(metrics_engines)
+    app.add_middleware(metrics.MetricsMiddleware, routes=app.routes)
+    app.add_route("/metrics", metrics.metrics, include_in_schema=False)
+
+
+@app.on_event("startup")
+async def load_revoked_tokens() -> None:
+    if settings.metrics_enabled:
+        # O threadpool do Starlette (run_in_threadpool) é o executor padrão do loop
+        asyncio.get_running_loop().set_default_executor(metrics.threadpool)
+    try:
+        await run_in_threadpool(sync_revoked_tokens)
+    except Exception:
+        # Banco fora do ar ao iniciar: a app sobe mesmo assim e a sincronização periódica carrega os tokens depois
+        logger.exception("Could not load the revoked tokens on startup")
+    asyncio.create_task(sync_revoked_tokens_periodically())
+    if settings.db_pool_validate_interval and not settings.db_pgbouncer:
+        asyncio.create_task(validate_connections_periodically())
+    if replicas.replicas:
+        asyncio.create_task(check_replicas_periodically())
+    if settings.metrics_enabled:
+        asyncio.create_task(metrics.sample_periodically(metrics_engines, metrics_caches))
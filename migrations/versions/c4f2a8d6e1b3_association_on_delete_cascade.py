@@ -0,0 +1,38 @@
+"""Association foreign keys on delete cascade
+
+Revision ID: c4f2a8d6e1b3
+Revises: a7c3e9f2d5b8
+Create Date: 2026-10-18 18:41:09.527230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f2a8d6e1b3'
+down_revision = 'a7c3e9f2d5b8'
+branch_labels = None
+depends_on = None
+
+# (tabela, coluna, tabela referenciada), nomes das constraints no padrão do PostgreSQL
+FOREIGN_KEYS = [
+    ('user_group', 'group_id', 'groups'),
+    ('user_group', 'user_id', 'users'),
+    ('group_permission', 'group_id', 'groups'),
+    ('group_permission', 'permission_id', 'permissions'),
+]
+
+
+def upgrade():
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'])
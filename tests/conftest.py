@@ -0,0 +1,44 @@
+import os
+
+# Settings obrigatórias sem .env; o banco dos testes é um SQLite em memória criado por teste
+for name, value in {
+    "APP_NAME": "test",
+    "APP_SECRET": "test-secret",
+    "APP_URL": "http://localhost",
+    "DB_CONNECTION": "postgresql",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_DATABASE": "test",
+    "DB_USERNAME": "test",
+    "DB_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from authentication import models  # noqa: F401 (registra as tabelas no metadata)
+from core.database import Base, enable_foreign_keys
+from core.instrumentation import instrument_engine
+
+'''
+Fixtures dos testes
+
+- db: sessão num SQLite em memória com as tabelas criadas e as consultas contadas (query_budget)
+- Rode com: python -m pytest
+'''
+
+
+@pytest.fixture
+def db() -> Session:
+    engine = create_engine("sqlite://")
+    enable_foreign_keys(engine)
+    instrument_engine(engine)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,61 @@
+from typing import Set
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from authentication import cruds, models, schemas
+from core.instrumentation import QueryStats, query_budget
+
+PERMISSIONS = 501
+
+
+@pytest.fixture
+def group(db: Session) -> models.Group:
+    db.execute(insert(models.Permission), [
+        {"id": id, "name": f"app.permission_{id}"} for id in range(1, PERMISSIONS + 1)
+    ])
+    db.commit()
+    return cruds.group.create(db, obj_in=schemas.GroupCreate(name="group", permissions=set(range(1, 501))))
+
+
+def association_statements(stats: QueryStats) -> list:
+    return [statement.split()[0] for statement in stats.statements.elements() if "group_permission" in statement]
+
+
+def permission_ids(db: Session, group_id: int) -> Set[int]:
+    statement = select(models.group_permission.c.permission_id).filter(models.group_permission.c.group_id == group_id)
+    return set(db.execute(statement).scalars())
+
+
+def test_one_changed_permission_out_of_500(db: Session, group: models.Group) -> None:
+    wanted = set(range(2, 502))
+    with query_budget(10) as stats:
+        cruds.group.update(db, db_obj=group, obj_in=schemas.GroupUpdate(name="group", permissions=wanted))
+    # Linhas atuais, um INSERT da permissão nova e um DELETE da removida
+    assert sorted(association_statements(stats)) == ["DELETE", "INSERT", "SELECT"]
+    assert permission_ids(db, group.id) == wanted
+
+
+def test_unset_permissions_skip_association_work(db: Session, group: models.Group) -> None:
+    with query_budget(10) as stats:
+        cruds.group.update(db, db_obj=group, obj_in=schemas.GroupUpdate(name="renamed"))
+    assert association_statements(stats) == []
+    assert permission_ids(db, group.id) == set(range(1, 501))
+
+
+def test_unchanged_permissions_only_read_the_association(db: Session, group: models.Group) -> None:
+    with query_budget(10) as stats:
+        cruds.group.update(
+            db, db_obj=group, obj_in=schemas.GroupUpdate(name="group", permissions=set(range(1, 501)))
+        )
+    assert association_statements(stats) == ["SELECT"]
+
+
+def test_unknown_ids_are_ignored(db: Session, group: models.Group) -> None:
+    with query_budget(10) as stats:
+        cruds.group.update(
+            db, db_obj=group, obj_in=schemas.GroupUpdate(name="group", permissions={*range(1, 501), 9999})
+        )
+    assert association_statements(stats) == ["SELECT"]
+    assert permission_ids(db, group.id) == set(range(1, 501))
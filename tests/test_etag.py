@@ -0,0 +1,75 @@
+from typing import Optional
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
+
+from authentication import cruds, models, schemas
+from core.etag import make_etag, not_modified, set_etag
+
+PATH = "/api/v1/authentication/permisions/1"
+
+
+@pytest.fixture
+def permission(db: Session) -> models.Permission:
+    db.execute(insert(models.Permission), [{"id": id, "name": f"app.permission_{id}"} for id in range(1, 4)])
+    db.commit()
+    return cruds.permission.get(db, id=1)
+
+
+def request(if_none_match: Optional[str] = None, path: str = PATH, query: str = "") -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({
+        "type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers,
+    })
+
+
+def etag_of(version: object, path: str = PATH, query: str = "") -> str:
+    response = Response()
+    set_etag(request(path=path, query=query), response, version)
+    return response.headers["ETag"]
+
+
+def test_matching_etag_is_not_modified(db: Session, permission: models.Permission) -> None:
+    etag = etag_of(permission.version)
+    response = not_modified(request(etag), cruds.permission.get_version(db, id=permission.id))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.body == b""
+
+
+def test_weak_and_listed_etags_match(db: Session, permission: models.Permission) -> None:
+    etag = etag_of(permission.version)
+    assert not_modified(request(f'"other", W/{etag}'), permission.version).status_code == 304
+    assert not_modified(request("*"), permission.version).status_code == 304
+
+
+def test_version_bumps_after_update(db: Session, permission: models.Permission) -> None:
+    etag = etag_of(permission.version)
+    assert permission.version == 1
+    cruds.permission.update(db, db_obj=permission, obj_in={"name": "app.renamed"})
+    assert permission.version == 2
+    assert cruds.permission.get_version(db, id=permission.id) == 2
+    assert not_modified(request(etag), cruds.permission.get_version(db, id=permission.id)) is None
+
+
+def test_list_etag_changes_when_one_row_changes(db: Session, permission: models.Permission) -> None:
+    path = "/api/v1/authentication/permisions/"
+    versions = cruds.permission.get_multi_versions(db)
+    assert versions == [(1, 1), (2, 1), (3, 1)]
+    etag = etag_of(versions, path=path)
+    assert not_modified(request(etag, path=path), cruds.permission.get_multi_versions(db)).status_code == 304
+    cruds.permission.update(db, db_obj=cruds.permission.get(db, id=3), obj_in={"name": "app.renamed"})
+    assert not_modified(request(etag, path=path), cruds.permission.get_multi_versions(db)) is None
+
+
+def test_etag_depends_on_the_url(permission: models.Permission) -> None:
+    assert etag_of(1, query="fields=id") != etag_of(1)
+    assert make_etag(request(), 1) == etag_of(1)
+
+
+def test_missing_row_has_no_etag(db: Session, permission: models.Permission) -> None:
+    assert cruds.permission.get_version(db, id=999) is None
+    assert not_modified(request("*"), None) is None
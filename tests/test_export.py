@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import io
+from decimal import Decimal
+from typing import AsyncIterator, List, Tuple
+
+import orjson
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from authentication import cruds, models, schemas
+from core.export import export_chunks, export_chunks_async, export_columns
+
+USERS = 25
+BATCH_SIZE = 10
+
+
+@pytest.fixture
+def users(db: Session) -> None:
+    db.execute(insert(models.User), [
+        {"id": id, "email": f"user{id}@example.com", "username": f"user{id}", "password": "secret", "is_active": True}
+        for id in range(1, USERS + 1)
+    ])
+    db.commit()
+
+
+def test_columns_are_the_schema_fields_in_the_table() -> None:
+    columns = export_columns(schemas.User, models.User.__table__)
+    assert "id" in columns and "email" in columns
+    assert "password" not in columns
+
+
+def test_rows_are_read_in_batches(db: Session, users: None) -> None:
+    batches = list(cruds.user.stream(db, columns=["id", "email"], batch_size=BATCH_SIZE))
+    assert [len(rows) for rows in batches] == [10, 10, 5]
+    assert [id for rows in batches for id, _ in rows] == list(range(1, USERS + 1))
+    assert cruds.user._stream_statement(["id"]).get_execution_options()["stream_results"]
+
+
+def test_ndjson_has_one_chunk_per_batch(db: Session, users: None) -> None:
+    columns = export_columns(schemas.User, models.User.__table__)
+    chunks = list(export_chunks("ndjson", columns, cruds.user.stream(db, columns=columns, batch_size=BATCH_SIZE)))
+    assert len(chunks) == 3
+    lines = b"".join(chunks).splitlines()
+    assert len(lines) == USERS
+    first = orjson.loads(lines[0])
+    assert set(first) == set(columns)
+    assert first["id"] == 1 and first["email"] == "user1@example.com"
+
+
+def test_csv_starts_with_the_header(db: Session, users: None) -> None:
+    columns = ["id", "email"]
+    chunks = list(export_chunks("csv", columns, cruds.user.stream(db, columns=columns, batch_size=BATCH_SIZE)))
+    assert len(chunks) == 4
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == columns
+    assert rows[1] == ["1", "user1@example.com"]
+    assert len(rows) == USERS + 1
+
+
+def test_chunks_are_produced_lazily() -> None:
+    read: List[int] = []
+
+    def batches():
+        for index in range(3):
+            read.append(index)
+            yield [(index,)]
+
+    chunks = export_chunks("ndjson", ["id"], batches())
+    assert next(chunks) == b'{"id":0}\n'
+    assert read == [0]
+
+
+def test_values_without_a_json_type_are_strings() -> None:
+    chunk = next(export_chunks("ndjson", ["price"], iter([[(Decimal("1.50"),)]])))
+    assert orjson.loads(chunk) == {"price": "1.50"}
+
+
+def test_async_chunks_match_the_sync_ones() -> None:
+    rows: List[List[Tuple]] = [[(1, "a@example.com")], [(2, "b@example.com")]]
+
+    async def batches() -> AsyncIterator[List[Tuple]]:
+        for batch in rows:
+            yield batch
+
+    async def collect(format: str) -> List[bytes]:
+        return [chunk async for chunk in export_chunks_async(format, ["id", "email"], batches())]
+
+    for format in ("ndjson", "csv"):
+        assert asyncio.run(collect(format)) == list(export_chunks(format, ["id", "email"], iter(rows)))
@@ -0,0 +1,81 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from authentication import cruds, models
+from core.cruds import CRUDBase
+from core.filters import Filter, parse_filters, parse_sort
+
+COLUMNS = cruds.user.filter_columns()
+
+
+@pytest.fixture
+def users(db: Session) -> None:
+    db.execute(insert(models.User), [
+        {"id": id, "email": f"user{id}@example.com", "username": f"user{id}", "password": "-", "is_active": id % 2 == 1}
+        for id in range(1, 7)
+    ])
+    db.execute(insert(models.Group), [{"id": 1, "name": "group"}])
+    db.execute(insert(models.user_group), [{"user_id": 2, "group_id": 1}, {"user_id": 3, "group_id": 1}])
+    db.commit()
+
+
+@pytest.mark.parametrize("value", ["password:eq:secret", "first_name:eq:a", "id:eq:1", "groups.name:eq:a"])
+def test_field_not_in_the_allowlist_is_rejected(value: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        parse_filters([value], COLUMNS)
+    assert error.value.status_code == 400
+    assert error.value.detail == f"Invalid filter: {value}"
+
+
+@pytest.mark.parametrize("value", ["email:like:a", "email", "email:", "is_active:eq:maybe", "groups:in:1|x"])
+def test_invalid_operator_or_value_is_rejected(value: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        parse_filters([value], COLUMNS)
+    assert error.value.status_code == 400
+
+
+def test_values_take_the_type_of_the_column() -> None:
+    assert parse_filters(["is_active:eq:no", "groups:in:1|2", "email:prefix:a_b"], COLUMNS) == (
+        Filter("is_active", "eq", False), Filter("groups", "in", (1, 2)), Filter("email", "prefix", "a_b"),
+    )
+
+
+@pytest.mark.parametrize("sort", ["first_name", "-password", "email,-is_active"])
+def test_sort_not_in_the_allowlist_is_rejected(sort: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        parse_sort(sort, cruds.user.sortable)
+    assert error.value.status_code == 400
+
+
+def test_sort_keys_keep_their_order_without_repeats() -> None:
+    assert parse_sort("-username, email,-username", cruds.user.sortable) == (("username", True), ("email", False))
+    assert parse_sort(None, cruds.user.sortable) == ()
+
+
+def test_unindexed_column_is_rejected_when_the_crud_is_created() -> None:
+    class CRUDUnindexed(CRUDBase):
+        filterable = ("first_name",)
+        sortable = ("id", "last_name")
+
+    with pytest.raises(ValueError, match="users.first_name, users.last_name"):
+        CRUDUnindexed(models.User)
+
+
+def test_unindexed_column_can_be_allowed_explicitly() -> None:
+    class CRUDUnindexed(CRUDBase):
+        filterable = ("first_name",)
+        unindexed = ("first_name",)
+
+    assert "first_name" in CRUDUnindexed(models.User).filter_columns()
+
+
+def test_filters_select_the_rows(db: Session, users: None) -> None:
+    def ids(*values: str) -> list:
+        return [user.id for user in cruds.user.get_multi(db, filters=parse_filters(values, COLUMNS))]
+
+    assert ids("is_active:eq:true") == [1, 3, 5]
+    assert ids("groups:eq:1") == [2, 3]
+    assert ids("groups:in:1|9", "is_active:eq:false") == [2]
+    assert ids("email:in:user4@example.com|user6@example.com") == [4, 6]
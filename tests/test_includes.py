@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from authentication import cruds, models, schemas
+from core.instrumentation import query_budget
+
+GROUPS = 3
+PERMISSIONS_PER_GROUP = 4
+
+
+def seed(db: Session, users: int) -> None:
+    db.execute(insert(models.Permission), [
+        {"id": id, "name": f"app.permission_{id}"} for id in range(1, GROUPS * PERMISSIONS_PER_GROUP + 1)
+    ])
+    db.execute(insert(models.Group), [{"id": id, "name": f"group{id}"} for id in range(1, GROUPS + 1)])
+    db.execute(insert(models.group_permission), [
+        {"group_id": group_id, "permission_id": (group_id - 1) * PERMISSIONS_PER_GROUP + index}
+        for group_id in range(1, GROUPS + 1) for index in range(1, PERMISSIONS_PER_GROUP + 1)
+    ])
+    db.execute(insert(models.User), [
+        {"id": id, "email": f"user{id}@example.com", "username": f"user{id}", "password": "-"}
+        for id in range(1, users + 1)
+    ])
+    db.execute(insert(models.user_group), [
+        {"user_id": user_id, "group_id": group_id}
+        for user_id in range(1, users + 1) for group_id in range(1, GROUPS + 1)
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("users", [1, 25])
+def test_include_groups_permissions_query_count_is_constant(db: Session, users: int) -> None:
+    seed(db, users)
+    # users, groups (selectinload) e permissions (selectinload), inclusive na serialização da resposta
+    with query_budget(3) as stats:
+        items = cruds.user.get_multi(db, limit=users, include=("groups", "groups.permissions"))
+        response = [schemas.UserWithGroups.from_orm(item) for item in items]
+    assert stats.count == 3
+    assert len(response) == users
+    assert all(len(group.permissions) == PERMISSIONS_PER_GROUP for user in response for group in user.groups)
+
+
+def test_get_include_groups_permissions_query_count(db: Session) -> None:
+    seed(db, 1)
+    with query_budget(3) as stats:
+        user = schemas.UserWithGroups.from_orm(cruds.user.get(db, 1, include=("groups", "groups.permissions")))
+    assert stats.count == 3
+    assert len(user.groups) == GROUPS
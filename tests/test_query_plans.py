@@ -0,0 +1,113 @@
+from typing import Any, List
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from authentication import cruds, models
+from core.cruds import CRUDBase
+from core.filters import Filter
+
+'''
+Planos (EXPLAIN) das listagens, dos filtros e ordenações liberados e das consultas de autorização
+
+- Os filtros e as consultas de autorização falham se o plano ler uma tabela inteira
+  (SCAN <tabela> sem índice no SQLite, Seq Scan no PostgreSQL)
+- As ordenações falham se o banco precisar ordenar as linhas em vez de ler a ordem de um índice
+'''
+
+USERS = 2000
+GROUPS = 1000
+PERMISSIONS = 200
+GROUPS_PER_USER = 3
+PERMISSIONS_PER_GROUP = 5
+CRUDS = {"users": cruds.user, "groups": cruds.group, "permissions": cruds.permission}
+VALUES = {bool: True, int: 1, str: "name1"}
+
+
+@pytest.fixture
+def seeded(db: Session) -> Session:
+    db.execute(insert(models.Permission), [
+        {"id": id, "name": f"app.permission_{id}"} for id in range(1, PERMISSIONS + 1)
+    ])
+    db.execute(insert(models.Group), [{"id": id, "name": f"group{id}"} for id in range(1, GROUPS + 1)])
+    db.execute(insert(models.User), [
+        {"id": id, "email": f"user{id}@example.com", "username": f"user{id}", "password": "-", "is_active": id % 10 > 0}
+        for id in range(1, USERS + 1)
+    ])
+    db.execute(insert(models.group_permission), [
+        {"group_id": group_id, "permission_id": (group_id * 7 + index) % PERMISSIONS + 1}
+        for group_id in range(1, GROUPS + 1) for index in range(PERMISSIONS_PER_GROUP)
+    ])
+    db.execute(insert(models.user_group), [
+        {"user_id": user_id, "group_id": (user_id + index * 17) % GROUPS + 1}
+        for user_id in range(1, USERS + 1) for index in range(GROUPS_PER_USER)
+    ])
+    db.commit()
+    db.connection().exec_driver_sql("ANALYZE")
+    return db
+
+
+def explain(db: Session, statement: Select) -> List[str]:
+    connection = db.connection()
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True, "render_postcompile": True}
+    )
+    if connection.dialect.name == "postgresql":
+        return connection.exec_driver_sql(f"EXPLAIN {compiled}").scalars().all()
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+
+def sequential_scans(plan: List[str]) -> List[str]:
+    return [line for line in plan if "Seq Scan" in line or (line.startswith("SCAN ") and "INDEX" not in line)]
+
+
+def sorted_without_index(plan: List[str]) -> bool:
+    return any(line.startswith("Sort") or "->  Sort" in line or "TEMP B-TREE FOR ORDER BY" in line for line in plan)
+
+
+def filter_value(crud: CRUDBase, name: str) -> Any:
+    return VALUES[crud.filter_columns()[name].type.python_type]
+
+
+FILTERS = [(table, name) for table, crud in CRUDS.items() for name in crud.filterable]
+SORTS = [(table, name) for table, crud in CRUDS.items() for name in crud.sortable]
+
+
+@pytest.mark.parametrize("table, name", FILTERS)
+def test_allowlisted_filter_uses_an_index(seeded: Session, table: str, name: str) -> None:
+    crud = CRUDS[table]
+    # Só o WHERE: com ORDER BY id LIMIT o SQLite pode preferir percorrer a chave primária e filtrar linha a linha
+    statement = select(crud.model).filter(crud._filter_clause(Filter(name, "eq", filter_value(crud, name))))
+    assert sequential_scans(explain(seeded, statement)) == []
+
+
+@pytest.mark.parametrize("table, name", SORTS)
+def test_allowlisted_sort_uses_an_index(seeded: Session, table: str, name: str) -> None:
+    # A ordem vem de um índice (ou da chave primária, SCAN <tabela> no SQLite) e a leitura para no LIMIT
+    plan = explain(seeded, CRUDS[table]._get_multi_statement(sort=((name, True),)))
+    assert not sorted_without_index(plan), plan
+
+
+AUTHORIZATION_QUERIES = {
+    "has_permission": cruds.user._permissions_statement(USERS // 2)
+        .filter(models.Permission.name == "app.permission_42").limit(1),
+    "permission_names": cruds.user._permissions_statement(USERS // 2),
+    "groups_permissions": cruds.user._groups_permissions_statement(USERS // 2),
+    "permission_id_by_name": select(models.Permission.id).filter(models.Permission.name == "app.permission_42"),
+    "user_by_email": select(models.User).filter(models.User.email == "user1000@example.com"),
+    # Consultas do selectinload de include=groups,groups.permissions
+    "load_user_groups": select(models.user_group.c.user_id, models.Group)
+        .join(models.Group, models.Group.id == models.user_group.c.group_id)
+        .filter(models.user_group.c.user_id.in_([1000, 1001])),
+    "load_group_permissions": select(models.group_permission.c.group_id, models.Permission)
+        .join(models.Permission, models.Permission.id == models.group_permission.c.permission_id)
+        .filter(models.group_permission.c.group_id.in_([1, 2, 3])),
+    "users_by_group": select(models.user_group.c.user_id).filter(models.user_group.c.group_id == 1),
+}
+
+
+@pytest.mark.parametrize("name", AUTHORIZATION_QUERIES)
+def test_authorization_query_uses_an_index(seeded: Session, name: str) -> None:
+    assert sequential_scans(explain(seeded, AUTHORIZATION_QUERIES[name])) == []
@@ -0,0 +1,63 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+
+from authentication import models
+from core.database import Base, ReconnectingSession
+
+
+class LostConnection(sqlite3.OperationalError):
+    pass
+
+
+@pytest.fixture
+def session(tmp_path: Path) -> Session:
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Permission), [{"id": 1, "name": "app.permission_1"}])
+    lost = []
+
+    @event.listens_for(engine, "do_execute")
+    def drop_connection(cursor, statement, parameters, context):
+        # Simula a conexão do pool encerrada pelo servidor, uma vez por teste
+        if lost == [True]:
+            lost.append(False)
+            raise LostConnection("server closed the connection unexpectedly")
+
+    @event.listens_for(engine, "handle_error")
+    def is_disconnect(context):
+        if isinstance(context.original_exception, LostConnection):
+            context.is_disconnect = True
+
+    db = sessionmaker(bind=engine, autoflush=False, class_=ReconnectingSession)()
+    db.lose_connection = lambda: lost.append(True)
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_first_statement_runs_again_on_a_new_connection(session: Session) -> None:
+    session.lose_connection()
+    assert session.execute(select(models.Permission.name)).scalars().all() == ["app.permission_1"]
+
+
+def test_first_statement_after_commit_runs_again(session: Session) -> None:
+    session.execute(select(models.Permission.id)).all()
+    session.commit()
+    session.lose_connection()
+    assert session.get(models.Permission, 1).name == "app.permission_1"
+
+
+def test_later_statements_are_not_retried(session: Session) -> None:
+    session.execute(select(models.Permission.id)).all()
+    session.lose_connection()
+    with pytest.raises(DBAPIError) as error:
+        session.execute(select(models.Permission.name)).all()
+    assert error.value.connection_invalidated
@@ -0,0 +1,114 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from authentication import cruds, models, schemas
+from authentication.cache import principal_cache
+from core.database import Base, enable_foreign_keys
+from core.instrumentation import query_budget
+
+
+@pytest.fixture
+def rows(db: Session) -> None:
+    seed(db.execute)
+    db.commit()
+
+
+def seed(execute) -> None:
+    execute(insert(models.User), [
+        {"id": id, "email": f"user{id}@example.com", "username": f"user{id}", "password": "-", "is_active": True}
+        for id in (1, 2)
+    ])
+    execute(insert(models.Permission), [{"id": id, "name": f"app.permission_{id}"} for id in (1, 2)])
+    execute(insert(models.Group), [{"id": id, "name": f"group{id}"} for id in (1, 2)])
+    execute(insert(models.user_group), [
+        {"user_id": 1, "group_id": 1}, {"user_id": 1, "group_id": 2}, {"user_id": 2, "group_id": 1},
+    ])
+    execute(insert(models.group_permission), [
+        {"group_id": 1, "permission_id": 1}, {"group_id": 1, "permission_id": 2}, {"group_id": 2, "permission_id": 1},
+    ])
+
+
+def association_rows(db: Session, column) -> List[int]:
+    return sorted(db.execute(select(column)).scalars())
+
+
+def count(db: Session, model) -> int:
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_missing_id_returns_none(db: Session, rows: None) -> None:
+    with query_budget(5) as stats:
+        assert cruds.user.remove(db, id=999, returning=True) is None
+    assert not any(statement.startswith("DELETE") for statement in stats.statements)
+    assert count(db, models.User) == 2
+
+
+def test_removed_row_comes_back_without_a_load(db: Session, rows: None) -> None:
+    user = cruds.user.remove(db, id=1, returning=True)
+    assert (user.id, user.email, user.version) == (1, "user1@example.com", 1)
+    assert cruds.user.get(db, id=1) is None
+
+
+def test_user_removal_cascades_its_groups(db: Session, rows: None) -> None:
+    cruds.user.remove(db, id=1, returning=True)
+    assert association_rows(db, models.user_group.c.user_id) == [2]
+    assert count(db, models.Group) == 2
+
+
+def test_group_removal_cascades_users_and_permissions(db: Session, rows: None) -> None:
+    assert cruds.group.remove(db, id=1, returning=True).name == "group1"
+    assert association_rows(db, models.user_group.c.group_id) == [2]
+    assert association_rows(db, models.group_permission.c.group_id) == [2]
+    assert count(db, models.Permission) == 2
+
+
+def test_permission_removal_cascades_its_groups(db: Session, rows: None) -> None:
+    cruds.permission.remove(db, id=1, returning=True)
+    assert association_rows(db, models.group_permission.c.permission_id) == [2]
+
+
+def test_row_already_in_the_session_is_detached(db: Session, rows: None) -> None:
+    loaded = cruds.user.get(db, id=2)
+    removed = cruds.user.remove(db, id=2, returning=True)
+    assert removed is not loaded and removed.email == loaded.email
+    assert loaded not in db
+    db.commit()
+
+
+def test_removal_drops_the_cached_principal(db: Session, rows: None) -> None:
+    principal_cache.set(1, schemas.Principal(id=1, groups=frozenset({1, 2})))
+    cruds.user.remove(db, id=1, returning=True)
+    assert principal_cache.get(1) is None
+
+
+def test_bulk_removal_skips_missing_ids_and_cascades(db: Session, rows: None) -> None:
+    removed = cruds.group.remove_multi(db, ids=[2, 999, 1])
+    assert sorted(group.id for group in removed) == [1, 2]
+    assert count(db, models.user_group) == 0
+    assert count(db, models.group_permission) == 0
+
+
+def test_async_removal_matches_the_sync_one() -> None:
+    async def remove(id: int) -> Tuple[Optional[models.User], List[int]]:
+        engine = create_async_engine("sqlite+aiosqlite://")
+        enable_foreign_keys(engine.sync_engine)
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+                await connection.run_sync(lambda sync_connection: seed(sync_connection.execute))
+            async with sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+                user = await cruds.user_async.remove(db, id=id, returning=True)
+                groups = (await db.execute(select(models.user_group.c.user_id))).scalars().all()
+                return user, sorted(groups)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(remove(999)) == (None, [1, 1, 2])
+    user, groups = asyncio.run(remove(1))
+    assert user.email == "user1@example.com"
+    assert groups == [2]